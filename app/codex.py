@@ -1,16 +1,19 @@
 import asyncio
+import io
 import json
 import logging
+import mmap
 import os
 import re
 import shutil
 import threading
 import tempfile
+from collections import deque
 from contextlib import asynccontextmanager, suppress
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
 
 try:
     import tomllib
@@ -45,10 +48,19 @@ _PROFILE_FILES = (
 )
 
 _ASYNCIO_STREAM_LIMIT = 512 * 1024  # 512 KiB to tolerate large tool outputs
+# Spawns the Codex CLI; tests swap this instead of patching the asyncio module.
+_subprocess_factory = asyncio.create_subprocess_exec
+_STDOUT_READ_SIZE = 64 * 1024
+_STDERR_READ_SIZE = 32 * 1024
+_RAW_STDOUT_TAIL_LINES = 256
 
 _WORKDIR_LOCK = threading.Lock()
 _WORKDIR_PATH: Optional[Path] = None
 _WORKDIR_NEEDS_SKIP_GIT_CHECK = False
+_CODEX_ENV_CACHE: Optional[Tuple[Tuple[Optional[str], ...], Dict[str, str]]] = None
+# Directories already confirmed writable; failures are never cached so a
+# permission fix is picked up on the next probe.
+_VERIFIED_WRITABLE_DIRS: Set[str] = set()
 
 
 class _CodexConcurrencyLimiter:
@@ -75,34 +87,40 @@ class _CodexConcurrencyLimiter:
                 float(settings.codex_queue_timeout_seconds),
             )
         self._queue_timeout_seconds = max(0.0, float(queue_timeout_seconds))
-        self._semaphore = asyncio.Semaphore(value)
+        # Bounded so an unmatched release() fails loudly instead of widening the pool.
+        self._semaphore = asyncio.BoundedSemaphore(value)
+        self._acquire = self._semaphore.acquire
 
     @property
     def max_parallel(self) -> int:
         return self._max_parallel
 
-    @asynccontextmanager
-    async def slot(self) -> AsyncIterator[None]:
-        acquired = False
+    async def acquire(self) -> None:
+        """Wait for a free slot, raising a 503 CodexError on queue timeout."""
         try:
             if self._queue_timeout_seconds > 0:
                 await asyncio.wait_for(
-                    self._semaphore.acquire(),
+                    self._acquire(),
                     timeout=self._queue_timeout_seconds,
                 )
             else:
-                await self._semaphore.acquire()
-            acquired = True
+                await self._acquire()
         except asyncio.TimeoutError as exc:
             raise CodexError(
                 "Codex worker pool is busy; timed out waiting for an available slot",
                 status_code=503,
             ) from exc
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
         try:
             yield
         finally:
-            if acquired:
-                self._semaphore.release()
+            self.release()
 
 
 _parallel_limiter = _CodexConcurrencyLimiter(
@@ -137,6 +155,17 @@ _KNOWN_METADATA_PREFIXES = (
     "error:",
     "tool ",
 )
+# One anchored alternation instead of a Python-level startswith loop per line.
+_METADATA_PREFIX_RE = re.compile(
+    "|".join(re.escape(prefix) for prefix in _KNOWN_METADATA_PREFIXES)
+)
+_ROLE_MARKER_RE = re.compile(r"(?P<user>user instructions:|user:)|(?P<assistant>assistant:)")
+# `[^\W_]` is exactly str.isalnum() for a single character.
+_FIRST_ALNUM_RE = re.compile(r"[^\W_]")
+_JSON_STRING_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"')
+# Inside a user block, only lines containing one of these (ASCII,
+# lower-cased) can change filter state; everything else is dropped as-is.
+_USER_BLOCK_EXIT_HINTS = (b"user", b"assistant", b"codex", b" success", b" failed")
 
 
 class _CodexOutputFilter:
@@ -149,35 +178,42 @@ class _CodexOutputFilter:
         self._skip_tool_output = False
         self._tool_output_depth = 0
 
+    def should_consider(self, raw_line: bytes) -> bool:
+        """Return False when `process` would drop this raw line without side effects."""
+        if not self._in_user_block or self._skip_tool_output:
+            return True
+        lowered = raw_line.lower()
+        return any(hint in lowered for hint in _USER_BLOCK_EXIT_HINTS)
+
     def process(self, raw_line: str) -> Optional[str]:
         line = raw_line.rstrip("\r\n")
         stripped = line.strip()
+        match = _match_timestamp(stripped)
         if self._skip_tool_output:
             if not stripped:
                 self._skip_tool_output = False
                 return None
-            if _TIMESTAMP_LINE.match(stripped):
+            if match:
                 self._skip_tool_output = False
             else:
                 self._tool_output_depth += _json_structure_delta(stripped)
                 if self._tool_output_depth <= 0:
                     self._skip_tool_output = False
                 return None
-        lowered = stripped.lower()
-        match = _TIMESTAMP_LINE.match(stripped)
+        # Lower-case and strip once per line; every check below reuses it.
         if match:
             remainder = stripped[match.end() :].strip().lower()
             normalized = _strip_leading_symbols(remainder)
         else:
-            normalized = _strip_leading_symbols(lowered)
+            normalized = _strip_leading_symbols(stripped.lower())
 
-        if normalized.startswith("user instructions:") or normalized.startswith("user:"):
-            self._in_user_block = True
-            return None
-
-        if normalized.startswith("assistant:"):
-            self._in_user_block = False
-            self._saw_assistant = True
+        role_marker = _ROLE_MARKER_RE.match(normalized)
+        if role_marker is not None:
+            if role_marker.lastgroup == "user":
+                self._in_user_block = True
+            else:
+                self._in_user_block = False
+                self._saw_assistant = True
             return None
 
         if (
@@ -204,7 +240,8 @@ class _CodexOutputFilter:
                 return None
             return None
 
-        if _is_metadata_line(stripped):
+        # Same test as _is_metadata_line, without re-normalizing the line.
+        if match is not None or _METADATA_PREFIX_RE.match(normalized):
             return None
 
         if not self._saw_assistant:
@@ -215,29 +252,34 @@ class _CodexOutputFilter:
         return f"{line}\n"
 
 
+def _match_timestamp(text: str) -> Optional[re.Match[str]]:
+    # "[YYYY-MM-DDTHH:MM:SS]" is 21 chars; most lines fail this before the regex runs.
+    if len(text) < 21 or text[0] != "[":
+        return None
+    return _TIMESTAMP_LINE.match(text)
+
+
 def _is_metadata_line(text: str) -> bool:
-    if _TIMESTAMP_LINE.match(text):
+    if _match_timestamp(text):
         return True
     lower = text.lower()
     normal = _strip_leading_symbols(lower)
-    return any(normal.startswith(prefix) for prefix in _KNOWN_METADATA_PREFIXES)
+    return _METADATA_PREFIX_RE.match(normal) is not None
 
 
 def _strip_leading_symbols(value: str) -> str:
-    idx = 0
-    length = len(value)
-    while idx < length and not value[idx].isalnum():
-        idx += 1
-    if idx == 0:
+    if not value or value[0].isalnum():
         return value
-    return value[idx:]
+    # Emoji/bullet-prefixed status lines: one regex scan instead of a char loop.
+    match = _FIRST_ALNUM_RE.search(value)
+    return value[match.start() :] if match is not None else ""
 
 
 def _looks_like_codex_marker(text: str) -> bool:
     lowered = text.lower()
     if lowered.startswith("assistant"):
         return True
-    if _TIMESTAMP_LINE.match(text) and " codex" in lowered:
+    if " codex" in lowered and _match_timestamp(text):
         return True
     return False
 
@@ -245,46 +287,39 @@ def _looks_like_codex_marker(text: str) -> bool:
 def _json_structure_delta(text: str) -> int:
     """Compute net change in JSON nesting depth for a given line."""
 
-    delta = 0
-    in_string = False
-    escape = False
-    for ch in text:
-        if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == '"':
-                in_string = False
-            continue
-        if ch == '"':
-            in_string = True
-            continue
-        if ch in "[{":
-            delta += 1
-        elif ch in "]}":
-            delta -= 1
-    return delta
+    if '"' in text:
+        # Drop string literals (braces inside them do not count); an
+        # unterminated string swallows the rest of the line.
+        text = _JSON_STRING_LITERAL.sub("", text)
+        quote = text.find('"')
+        if quote != -1:
+            text = text[:quote]
+    return text.count("{") + text.count("[") - text.count("}") - text.count("]")
 
 
 def _sanitize_codex_text(raw: str) -> str:
     """Filter Codex CLI output down to assistant-visible text."""
 
     filt = _CodexOutputFilter()
-    parts: list[str] = []
+    buf = io.StringIO()
+    # `process` strips trailing newlines itself, so feed lines as-is.
     for line in raw.splitlines():
-        processed = filt.process(f"{line}\n")
+        processed = filt.process(line)
         if processed:
-            parts.append(processed)
+            buf.write(processed)
 
-    cleaned = "".join(parts).rstrip("\n")
-    return cleaned
+    return buf.getvalue().rstrip("\n")
 
 
 def _resolve_codex_executable() -> str:
     """Return the resolved Codex CLI executable path or raise CodexError."""
 
-    codex_exe = settings.codex_path
+    return _resolve_codex_executable_for(settings.codex_path)
+
+
+@lru_cache(maxsize=4)
+def _resolve_codex_executable_for(codex_exe: str) -> str:
+    # Keyed on CODEX_PATH; failures raise and are therefore never cached.
     if os.path.isabs(codex_exe):
         if not (os.path.isfile(codex_exe) and os.access(codex_exe, os.X_OK)):
             raise CodexError(
@@ -312,15 +347,15 @@ def _ensure_workdir_exists() -> None:
             return
 
         requested_path = Path(settings.codex_workdir).expanduser()
-        candidates: list[Path] = [requested_path]
-
-        fallback_candidates = [
-            Path(tempfile.gettempdir()) / "codex-workdir",
-            Path.home() / ".cache" / "codex-wrapper",
-        ]
-        for fallback in fallback_candidates:
-            if fallback not in candidates:
-                candidates.append(fallback)
+        candidates = list(
+            dict.fromkeys(
+                (
+                    requested_path,
+                    Path(tempfile.gettempdir()) / "codex-workdir",
+                    Path.home() / ".cache" / "codex-wrapper",
+                )
+            )
+        )
 
         errors: list[tuple[Path, Exception]] = []
         resolved: Optional[Path] = None
@@ -385,21 +420,12 @@ def _resolve_codex_home_dir() -> Path:
 
     env_home = os.environ.get("CODEX_HOME")
     if env_home:
-        env_path = Path(env_home).expanduser()
-        if env_path not in candidates:
-            candidates.append(env_path)
+        candidates.append(Path(env_home).expanduser())
 
-    default_home = Path.home() / ".codex"
-    if default_home not in candidates:
-        candidates.append(default_home)
-
-    workspace_home = Path(settings.codex_workdir).expanduser() / ".codex"
-    if workspace_home not in candidates:
-        candidates.append(workspace_home)
-
-    temp_home = Path(tempfile.gettempdir()) / "codex"
-    if temp_home not in candidates:
-        candidates.append(temp_home)
+    candidates.append(Path.home() / ".codex")
+    candidates.append(Path(settings.codex_workdir).expanduser() / ".codex")
+    candidates.append(Path(tempfile.gettempdir()) / "codex")
+    candidates = list(dict.fromkeys(candidates))
 
     for candidate in candidates:
         try:
@@ -432,20 +458,23 @@ def _resolve_codex_home_dir() -> Path:
 
 
 def _verify_directory_write_access(directory: Path) -> None:
-    test_path: Optional[Path] = None
+    key = os.fspath(directory)
+    if key in _VERIFIED_WRITABLE_DIRS:
+        return
+    if os.access(directory, os.W_OK | os.X_OK):
+        _VERIFIED_WRITABLE_DIRS.add(key)
+        return
+    # os.access can be wrong under Windows ACLs; confirm with a real write probe.
+    # A fresh unique name: O_EXCL on an existing file fails before the kernel
+    # checks directory write access, and we must not touch someone else's file.
     try:
-        with tempfile.NamedTemporaryFile(
-            dir=directory, prefix="codex-perm-", delete=False
-        ) as handle:
-            handle.write(b"codex")
-            handle.flush()
-            test_path = Path(handle.name)
-    except Exception as exc:  # pragma: no cover - startup failure path
+        fd, probe = tempfile.mkstemp(dir=directory, prefix=".codex-perm-")
+    except Exception as exc:
         raise PermissionError(f"write test failed: {exc}") from exc
-    finally:
-        if test_path:
-            with suppress(Exception):
-                test_path.unlink()
+    os.close(fd)
+    with suppress(Exception):
+        os.unlink(probe)
+    _VERIFIED_WRITABLE_DIRS.add(key)
 
 
 def _configure_codex_home_environment(resolved: Path, had_errors: bool) -> None:
@@ -472,6 +501,7 @@ def _configure_codex_home_environment(resolved: Path, had_errors: bool) -> None:
         elif resolved != default_home:
             logger.info("Setting CODEX_HOME to configured directory '%s'.", resolved_str)
         os.environ["CODEX_HOME"] = resolved_str
+        _base_environ.cache_clear()
 
     try:
         if settings.codex_config_dir != resolved_str:
@@ -513,7 +543,7 @@ def apply_codex_profile_overrides() -> None:
     for src_path, dest_name, legacy_name, primary_name in pending:
         dest_path = codex_home / dest_name
         try:
-            shutil.copyfile(src_path, dest_path)
+            _copy_file(src_path, dest_path)
         except Exception as exc:
             raise CodexError(
                 f"Failed to copy '{src_path}' to '{dest_path}': {exc}"
@@ -527,11 +557,71 @@ def apply_codex_profile_overrides() -> None:
         logger.info("Applied Codex profile override: %s -> %s", src_path, dest_path)
 
 
+def _copy_file(src: Path, dst: Path) -> None:
+    """Copy a file in-kernel via copy_file_range, falling back to shutil."""
+
+    copy_range = getattr(os, "copy_file_range", None)
+    if copy_range is None:
+        shutil.copyfile(src, dst)
+        return
+    try:
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            # No O_TRUNC yet: if dst is src, truncating first would wipe it.
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT, 0o666)
+            try:
+                src_st = os.fstat(src_fd)
+                dst_st = os.fstat(dst_fd)
+                if (src_st.st_dev, src_st.st_ino) == (dst_st.st_dev, dst_st.st_ino):
+                    raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+                os.ftruncate(dst_fd, 0)
+                remaining = src_st.st_size
+                while remaining > 0:
+                    copied = copy_range(src_fd, dst_fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+    except shutil.SameFileError:
+        raise
+    except OSError:
+        # e.g. EXDEV/ENOSYS on older kernels; shutil.copyfile uses sendfile.
+        shutil.copyfile(src, dst)
+
+
+@lru_cache(maxsize=1)
+def _base_environ() -> Dict[str, str]:
+    """Snapshot of os.environ; call `cache_clear()` after mutating the environment."""
+
+    # os.environ.copy() decodes every entry; copying this plain dict does not.
+    return dict(os.environ)
+
+
+def _codex_env_cache_key() -> Tuple[Optional[str], ...]:
+    """Everything `_build_codex_env` depends on; a hit skips the CODEX_HOME probing."""
+
+    return (
+        settings.codex_config_dir,
+        os.environ.get("CODEX_HOME"),
+        settings.codex_workdir,
+        getattr(settings, "codex_node_path", None),
+        str(Path.home()),
+    )
+
+
 def _build_codex_env() -> Dict[str, str]:
     """Prepare environment variables for Codex subprocesses."""
 
+    global _CODEX_ENV_CACHE
+    cached = _CODEX_ENV_CACHE
+    if cached is not None and cached[0] == _codex_env_cache_key():
+        return dict(cached[1])
+
     codex_home = _resolve_codex_home_dir()
-    env = os.environ.copy()
+    env = dict(_base_environ())
     env["CODEX_HOME"] = str(codex_home)
 
     config_dir = settings.codex_config_dir
@@ -545,28 +635,50 @@ def _build_codex_env() -> Dict[str, str]:
         env["CODEX_HOME"] = config_dir
 
     # Ensure `node` is available for Codex CLI shims when running under nvm.
-    if shutil.which("node", path=env.get("PATH", "")) is None:
-        candidate_dirs: List[Path] = []
-        codex_node_path = getattr(settings, "codex_node_path", None)
-        if codex_node_path:
-            candidate_dirs.append(Path(codex_node_path))
-        nvm_versions = Path.home() / ".nvm" / "versions" / "node"
-        if nvm_versions.is_dir():
-            for child in sorted(nvm_versions.iterdir(), reverse=True):
-                bin_dir = child / "bin"
-                if bin_dir.is_dir():
-                    candidate_dirs.append(bin_dir)
-        if candidate_dirs:
-            original_path = env.get("PATH", "")
+    node_path = _path_with_node(
+        env.get("PATH", ""),
+        getattr(settings, "codex_node_path", None),
+        str(Path.home()),
+    )
+    if node_path is not None:
+        env["PATH"] = node_path
+    # Resolving may rewrite codex_config_dir and CODEX_HOME; key on the settled state.
+    _CODEX_ENV_CACHE = (_codex_env_cache_key(), env)
+    return dict(env)
+
+
+@lru_cache(maxsize=8)
+def _path_with_node(
+    original_path: str, codex_node_path: Optional[str], home: str
+) -> Optional[str]:
+    """Return PATH extended with a directory providing `node`, or None to keep it."""
+
+    if shutil.which("node", path=original_path) is not None:
+        return None
+    node_name = "node.exe" if os.name == "nt" else "node"
+    candidate_dirs: List[str] = []
+    if codex_node_path:
+        candidate_dirs.append(codex_node_path)
+    nvm_versions = os.path.join(home, ".nvm", "versions", "node")
+    with suppress(OSError), os.scandir(nvm_versions) as entries:
+        versions = sorted((entry.path for entry in entries if entry.is_dir()), reverse=True)
+        candidate_dirs.extend(os.path.join(version, "bin") for version in versions)
+    for candidate in candidate_dirs:
+        if os.path.isfile(os.path.join(candidate, node_name)):
             path_parts = original_path.split(os.pathsep) if original_path else []
-            for candidate in candidate_dirs:
-                candidate_str = str(candidate)
-                if candidate_str not in path_parts:
-                    path_parts.insert(0, candidate_str)
-                if shutil.which("node", path=os.pathsep.join(path_parts)) is not None:
-                    env["PATH"] = os.pathsep.join(path_parts)
-                    break
-    return env
+            return os.pathsep.join([candidate, *(p for p in path_parts if p != candidate)])
+    return None
+
+
+def _toml_value(value: object) -> str:
+    """Render a `--config` override value as a TOML literal."""
+
+    # bool before anything numeric: bool is a subclass of int.
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return f'"{value}"'
+    return str(value)
 
 
 def _build_cmd_and_env(
@@ -618,7 +730,7 @@ def _build_cmd_and_env(
         cmd.append("--skip-git-repo-check")
     if images:
         for img in images:
-            cmd += ["--image", img]
+            cmd.extend(("--image", img))
 
     if (
         model
@@ -633,17 +745,10 @@ def _build_cmd_and_env(
         if key == "network_access":
             # handled separately when sandbox_mode is workspace-write
             continue
-        # Use TOML-style quoting for strings
-        if isinstance(value, str):
-            cmd += ["--config", f"{key}=\"{value}\""]
-        elif isinstance(value, bool):
-            bool_value = "true" if value else "false"
-            cmd += ["--config", f"{key}={bool_value}"]
-        else:
-            cmd += ["--config", f"{key}={value}"]
+        cmd.extend(("--config", f"{key}={_toml_value(value)}"))
 
     if model:
-        cmd += ["--config", f"model=\"{model}\""]
+        cmd.extend(("--config", f"model={_toml_value(model)}"))
 
     override_network = overrides.get("network_access") if overrides else None
 
@@ -655,12 +760,27 @@ def _build_cmd_and_env(
             else settings.workspace_network_access
         )
         if override_network is not None or settings.workspace_network_access:
-            toml_bool = "true" if allow_network else "false"
-            cmd += ["--config", f"sandbox_workspace_write={{ network_access = {toml_bool} }}"]
+            cmd.extend(
+                (
+                    "--config",
+                    f"sandbox_workspace_write={{ network_access = {_toml_value(allow_network)} }}",
+                )
+            )
 
     return cmd
 
 
+# `ModelPreset { ... }` bodies, allowing two levels of nested struct literals
+# (e.g. `ReasoningEffortPreset { .. }` inside `&[ .. ]`).
+_PRESET_BLOCK_RE = re.compile(
+    rb"ModelPreset\s*\{((?:[^{}]|\{(?:[^{}]|\{[^{}]*\})*\})*)\}"
+)
+_PRESET_MODEL_RE = re.compile(rb'model:\s*"([^"]+)"')
+_PRESET_EFFORT_RE = re.compile(
+    rb"effort:\s*(?:Some\()?\s*ReasoningEffort::([A-Za-z]+)\)?"
+)
+
+
 @lru_cache(maxsize=1)
 def load_builtin_model_presets() -> List[ModelPresetEntry]:
     """Load model presets defined in the Codex CLI submodule."""
@@ -677,7 +797,7 @@ def load_builtin_model_presets() -> List[ModelPresetEntry]:
     )
 
     try:
-        raw = preset_path.read_text(encoding="utf-8")
+        raw = preset_path.read_bytes()
     except FileNotFoundError:
         logger.warning("Codex model preset file not found: %s", preset_path)
         return []
@@ -685,57 +805,32 @@ def load_builtin_model_presets() -> List[ModelPresetEntry]:
         logger.warning("Failed to read Codex model presets from %s: %s", preset_path, exc)
         return []
 
-    model_pattern = re.compile(r'model:\s*"([^"]+)"')
-    effort_pattern = re.compile(
-        r"effort:\s*(?:Some\()?\s*ReasoningEffort::([A-Za-z]+)\)?"
-    )
+    presets = _parse_model_presets(raw)
+    if not presets:
+        logger.warning("Parsed zero Codex model presets from %s", preset_path)
+    return presets
 
-    def _extract_preset_blocks(text: str) -> List[str]:
-        blocks: List[str] = []
-        idx = 0
-        while True:
-            start = text.find("ModelPreset", idx)
-            if start == -1:
-                break
-            brace = text.find("{", start)
-            if brace == -1:
-                break
-            depth = 0
-            i = brace
-            while i < len(text):
-                ch = text[i]
-                if ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0:
-                        blocks.append(text[brace + 1 : i])
-                        idx = i + 1
-                        break
-                i += 1
-            else:
-                break
-        return blocks
 
+def _parse_model_presets(raw: bytes) -> List[ModelPresetEntry]:
+    # The preset file is ASCII Rust source: scan bytes, decode only captures.
     presets: List[ModelPresetEntry] = []
-    for block in _extract_preset_blocks(raw):
-        model_match = model_pattern.search(block)
+    for block in _PRESET_BLOCK_RE.findall(raw):
+        model_match = _PRESET_MODEL_RE.search(block)
         if not model_match:
             continue
-        model = model_match.group(1).strip()
+        model = model_match.group(1).decode("utf-8", errors="ignore").strip()
         if not model:
             continue
         if any(model.startswith(prefix) for prefix in _SKIP_PRESET_PREFIXES):
             continue
-        effort_matches = [m.lower() for m in effort_pattern.findall(block)]
+        effort_matches = [
+            m.decode("ascii").lower() for m in _PRESET_EFFORT_RE.findall(block)
+        ]
         if not effort_matches:
             presets.append(ModelPresetEntry(model=model, effort=None))
             continue
         for effort in effort_matches:
             presets.append(ModelPresetEntry(model=model, effort=effort))
-
-    if not presets:
-        logger.warning("Parsed zero Codex model presets from %s", preset_path)
     return presets
 
 
@@ -881,8 +976,7 @@ def _models_from_config() -> List[str]:
 
     for config_path in candidates:
         try:
-            with open(config_path, "rb") as fh:
-                data = tomllib.load(fh)
+            models = _models_from_config_file(config_path, config_path.stat().st_mtime_ns)
         except FileNotFoundError:
             continue
         except PermissionError as exc:
@@ -894,15 +988,23 @@ def _models_from_config() -> List[str]:
             logger.warning("Failed to parse Codex config '%s': %s", config_path, exc)
             continue
 
-        models = _models_from_config_data(data)
         if models:
-            return models
+            return list(models)
 
     if errors:
         logger.debug("Skipped Codex config models because: %s", "; ".join(errors))
     return []
 
 
+@lru_cache(maxsize=8)
+def _models_from_config_file(config_path: Path, mtime_ns: int) -> Tuple[str, ...]:
+    """Parse model names from one config file; `mtime_ns` keys the cache."""
+
+    with open(config_path, "rb") as fh:
+        data = tomllib.load(fh)
+    return tuple(_models_from_config_data(data))
+
+
 def _models_from_config_data(data: Dict[str, Any]) -> List[str]:
     models: List[str] = []
 
@@ -926,21 +1028,88 @@ def _models_from_config_data(data: Dict[str, Any]) -> List[str]:
     return _dedupe_preserving_order(augmented)
 
 
+_FAILURE_HINT_RE = re.compile(r"^error:|unauthorized|rate limit", re.IGNORECASE)
+_FAILURE_SCAN_LINES = 64
+_FAILURE_JSON_MAX_CHARS = 64 * 1024
+_FAILURE_SMALL_INPUT_CHARS = 2048
+# Whole-text twin of _FAILURE_HINT_RE ("^" is per stripped line there).
+_FAILURE_HINT_MULTILINE_RE = re.compile(
+    r"^[^\S\n]*error:|unauthorized|rate limit", re.IGNORECASE | re.MULTILINE
+)
+# Line breaks str.splitlines() honours besides "\n" (e.g. bare "\r" progress
+# redraws); the "\n"-only shortcut cannot be used when any are present.
+_FAILURE_OTHER_LINE_BREAKS_RE = re.compile("[\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]")
+
+
+def _small_failure_message(text: str) -> str:
+    """Same answer as the line scan below, for short output with no JSON."""
+    hit = None
+    for hit in _FAILURE_HINT_MULTILINE_RE.finditer(text):
+        pass
+    if hit is None:
+        last = text.rstrip().rpartition("\n")[2].strip()
+        return last or "codex execution failed"
+    start = text.rfind("\n", 0, hit.start()) + 1
+    end = text.find("\n", hit.end())
+    return text[start : end if end != -1 else len(text)].strip()
+
+
+def _failure_with_status(message: str) -> Tuple[str, Optional[int]]:
+    lower_msg = message.lower()
+    status_code = None
+    if "401" in message or "unauthorized" in lower_msg:
+        status_code = 401
+    elif "429" in message or "rate limit" in lower_msg:
+        status_code = 429
+    elif "timeout" in lower_msg:
+        status_code = 504
+
+    return message, status_code
+
+
 def _classify_codex_failure(stdout_text: str, stderr_text: str) -> Tuple[str, Optional[int]]:
     """Derive a human-readable error message and optional HTTP status code."""
 
-    def _collect_lines(text: str) -> List[str]:
-        return [line.strip() for line in text.splitlines() if line.strip()]
-
+    if (
+        len(stdout_text) + len(stderr_text) < _FAILURE_SMALL_INPUT_CHARS
+        and "{" not in stdout_text
+        and "{" not in stderr_text
+    ):
+        combined = f"{stderr_text}\n{stdout_text}"
+        # Few enough lines that each stream's tail window below would see all of them.
+        if (
+            combined.count("\n") < _FAILURE_SCAN_LINES
+            and _FAILURE_OTHER_LINE_BREAKS_RE.search(combined) is None
+        ):
+            return _failure_with_status(_small_failure_message(combined))
+
+    def _tail_lines(text: str) -> List[str]:
+        # Only the tail carries the failure; rsplit bounds the work, then
+        # splitlines() applies the same line breaks as a full scan would.
+        parts = text.rsplit("\n", _FAILURE_SCAN_LINES)
+        if len(parts) > _FAILURE_SCAN_LINES:
+            parts = parts[1:]
+        tail = [line.strip() for line in "\n".join(parts).splitlines() if line.strip()]
+        return tail[-_FAILURE_SCAN_LINES:]
+
+    # Cap each stream separately so a long stdout transcript cannot push the
+    # stderr error line out of the window.
     lines: List[str] = []
     if stderr_text:
-        lines.extend(_collect_lines(stderr_text))
+        lines.extend(_tail_lines(stderr_text))
     if stdout_text:
-        lines.extend(_collect_lines(stdout_text))
+        lines.extend(_tail_lines(stdout_text))
 
     message = None
     for line in reversed(lines):
-        if line.startswith("{") and line.endswith("}"):
+        if (
+            line.startswith("{")
+            and line.endswith("}")
+            and len(line) <= _FAILURE_JSON_MAX_CHARS
+            # Both shapes we read ({"message"} and {"error": {"message"}})
+            # need this key, so skip the parse when it cannot be present.
+            and '"message"' in line
+        ):
             try:
                 data = json.loads(line)
             except json.JSONDecodeError:
@@ -956,23 +1125,13 @@ def _classify_codex_failure(stdout_text: str, stderr_text: str) -> Tuple[str, Op
                 if isinstance(msg, str) and msg.strip():
                     message = msg.strip()
                     break
-        lowered = line.lower()
-        if lowered.startswith("error:") or "unauthorized" in lowered or "rate limit" in lowered:
+        if _FAILURE_HINT_RE.search(line):
             message = line
             break
     if message is None:
         message = lines[-1] if lines else "codex execution failed"
 
-    lower_msg = message.lower()
-    status_code = None
-    if "401" in message or "unauthorized" in lower_msg:
-        status_code = 401
-    elif "429" in message or "rate limit" in lower_msg:
-        status_code = 429
-    elif "timeout" in lower_msg:
-        status_code = 504
-
-    return message, status_code
+    return _failure_with_status(message)
 
 
 async def run_codex(
@@ -980,17 +1139,27 @@ async def run_codex(
     overrides: Optional[Dict] = None,
     images: Optional[List[str]] = None,
     model: Optional[str] = None,
+    coalesce: bool = False,
 ) -> AsyncIterator[str]:
-    """Run codex CLI as async generator yielding stdout lines suitable for SSE."""
+    """Run codex CLI as async generator yielding stdout lines suitable for SSE.
+
+    With ``coalesce`` set, all lines decoded from one stdout read are yielded
+    as a single string, so callers emit one SSE event per read instead of
+    one per line (without waiting for more output).
+    """
     cmd = _build_cmd_and_env(prompt, overrides, images, model)
     codex_env = _build_codex_env()
     output_filter = _CodexOutputFilter()
 
-    async with _parallel_limiter.slot():
+    # Plain acquire/release keeps the per-call path free of a context-manager object.
+    await _parallel_limiter.acquire()
+    try:
         proc = None
         stderr_task: Optional[asyncio.Task[str]] = None
         try:
-            proc = await asyncio.create_subprocess_exec(
+            # Keep this free of preexec_fn/start_new_session/user/group so CPython
+            # can spawn via vfork() instead of cloning the whole server process.
+            proc = await _subprocess_factory(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
@@ -1012,37 +1181,75 @@ async def run_codex(
         async def _read_stderr_text() -> str:
             if proc is None or proc.stderr is None:
                 return ""
-            data = await proc.stderr.read()
-            return data.decode(errors="ignore")
+            buf = bytearray()
+            while True:
+                chunk = await proc.stderr.read(_STDERR_READ_SIZE)
+                if not chunk:
+                    break
+                buf += chunk
+            return buf.decode(errors="ignore")
 
         timeout_seconds = float(settings.timeout_seconds)
-        started_at = asyncio.get_running_loop().time()
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
 
         def _remaining_timeout() -> Optional[float]:
             if timeout_seconds <= 0:
                 return None
-            elapsed = asyncio.get_running_loop().time() - started_at
+            elapsed = loop.time() - started_at
             remaining = timeout_seconds - elapsed
             if remaining <= 0:
                 raise asyncio.TimeoutError
             return remaining
 
+        # A real task, not opportunistic polling: StreamReader stops reading the
+        # pipe once 2*limit bytes are buffered, and a stalled stderr would then
+        # block codex (and our stdout loop) until the timeout fires.
         stderr_task = asyncio.create_task(_read_stderr_text())
-        raw_lines: List[str] = []
+        # Failure classification only reads the tail, so don't hold the whole
+        # transcript in memory for long successful runs.
+        raw_tail: Deque[bytearray] = deque(maxlen=_RAW_STDOUT_TAIL_LINES)
+
+        def _filter_line(line: bytearray) -> Optional[str]:
+            # Keep raw bytes for the failure path; decode only lines the filter
+            # might actually look at (echoed prompts are usually skipped).
+            raw_tail.append(line)
+            if not output_filter.should_consider(line):
+                return None
+            return output_filter.process(line.decode(errors="ignore"))
+
+        # Read stdout in large chunks and split locally rather than awaiting
+        # one readline() per line; `pending` holds the trailing partial line.
+        pending = bytearray()
         try:
-            while True:
-                if proc.stdout is None:
-                    break
+            while proc.stdout is not None:
                 remaining = _remaining_timeout()
                 if remaining is None:
-                    line = await proc.stdout.readline()
+                    chunk = await proc.stdout.read(_STDOUT_READ_SIZE)
                 else:
-                    line = await asyncio.wait_for(proc.stdout.readline(), timeout=remaining)
-                if not line:
+                    chunk = await asyncio.wait_for(
+                        proc.stdout.read(_STDOUT_READ_SIZE), timeout=remaining
+                    )
+                if not chunk:
                     break
-                decoded = line.decode(errors="ignore")
-                raw_lines.append(decoded)
-                filtered = output_filter.process(decoded.rstrip("\n"))
+                pending += chunk
+                # No newline in this chunk means no new complete line yet.
+                if b"\n" not in chunk:
+                    continue
+                # Split in bytes space; lines are decoded only if the filter wants them.
+                lines = pending.split(b"\n")
+                pending = lines.pop()
+                if coalesce:
+                    batch = "".join(text for text in map(_filter_line, lines) if text)
+                    if batch:
+                        yield batch
+                    continue
+                for line in lines:
+                    filtered = _filter_line(line)
+                    if filtered:
+                        yield filtered
+            if pending:
+                filtered = _filter_line(pending)
                 if filtered:
                     yield filtered
             remaining = _remaining_timeout()
@@ -1052,7 +1259,7 @@ async def run_codex(
                 await asyncio.wait_for(proc.wait(), timeout=remaining)
             if proc.returncode != 0:
                 stderr_text = await stderr_task
-                stdout_text = "".join(raw_lines)
+                stdout_text = b"\n".join(raw_tail).decode(errors="ignore")
                 message, status = _classify_codex_failure(stdout_text, stderr_text)
                 raise CodexError(message, status_code=status)
             with suppress(asyncio.CancelledError):
@@ -1077,7 +1284,25 @@ async def run_codex(
                 stderr_task.cancel()
                 with suppress(asyncio.CancelledError):
                     await stderr_task
+    finally:
+        _parallel_limiter.release()
+
 
+def _read_text_mapped(path: str) -> str:
+    """Decode a file straight from a read-only mapping (no intermediate bytes copy)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if not size:
+            return ""
+        with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mapped:
+            text = str(mapped, "utf-8", "ignore")
+    finally:
+        os.close(fd)
+    if "\r" in text:
+        # Match the universal-newline behaviour of text-mode open().
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
 
 async def run_codex_last_message(
@@ -1099,9 +1324,10 @@ async def run_codex_last_message(
     cmd = cmd + ["--json", "--output-last-message", out_path]
     proc = None
     try:
-        async with _parallel_limiter.slot():
+        await _parallel_limiter.acquire()
+        try:
             try:
-                proc = await asyncio.create_subprocess_exec(
+                proc = await _subprocess_factory(
                     *cmd,
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE,
@@ -1120,14 +1346,15 @@ async def run_codex_last_message(
             stdout_data, stderr_data = await asyncio.wait_for(
                 proc.communicate(), timeout=settings.timeout_seconds
             )
+        finally:
+            _parallel_limiter.release()
         if proc.returncode != 0:
             stdout_text = (stdout_data or b"").decode(errors="ignore")
             stderr_text = (stderr_data or b"").decode(errors="ignore")
             message, status = _classify_codex_failure(stdout_text, stderr_text)
             raise CodexError(message, status_code=status)
         try:
-            with open(out_path, "r", encoding="utf-8", errors="ignore") as f:
-                text = f.read()
+            text = _read_text_mapped(out_path)
         except Exception:
             text = ""
 
@@ -33,8 +33,11 @@ class Settings(BaseSettings):
     max_parallel_requests: int = Field(
         default=10, alias="CODEX_MAX_PARALLEL_REQUESTS"
     )
+    image_save_concurrency: int = Field(default=8, alias="CODEX_IMAGE_SAVE_CONCURRENCY")
     rate_limit_per_minute: int = Field(default=60, alias="RATE_LIMIT_PER_MINUTE")
     hide_reasoning: bool = Field(default=False, alias="CODEX_HIDE_REASONING")
+    # Merge the lines of each stdout read into one SSE delta (no added latency).
+    stream_coalesce: bool = Field(default=True, alias="CODEX_STREAM_COALESCE")
     # Allow server to honor x_codex.sandbox == "danger-full-access" requests.
     # When false, such requests are blocked if received (unless CODEX_LOCAL_ONLY is also false
     # in older behavior). Prefer enabling this explicitly for safety.
@@ -1,5 +1,5 @@
-import asyncio
 import time
+from array import array
 from typing import Optional
 
 from fastapi import Depends, HTTPException, Request, status
@@ -9,8 +9,11 @@ from .config import settings
 
 
 security = HTTPBearer(auto_error=False)
-_rate_lock = asyncio.Lock()
-_rate_data = {}
+# Fixed-size counters indexed by hash(ip). Colliding clients share a bucket,
+# which can only make the limit stricter, never looser.
+_BUCKET_COUNT = 4096  # must be a power of two
+_bucket_counts = array("i", [0]) * _BUCKET_COUNT
+_bucket_resets = array("d", [0.0]) * _BUCKET_COUNT
 
 
 async def verify_api_key(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> None:
@@ -20,6 +23,10 @@ async def verify_api_key(credentials: Optional[HTTPAuthorizationCredentials] = D
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
 
+def _bucket_index(ip: str) -> int:
+    return hash(ip) & (_BUCKET_COUNT - 1)
+
+
 async def rate_limiter(request: Request) -> None:
     """Simple in-memory rate limiter per IP address."""
     if settings.rate_limit_per_minute <= 0:
@@ -28,10 +35,12 @@ async def rate_limiter(request: Request) -> None:
     ip = request.client.host if request.client else "anonymous"
     now = time.time()
     window = 60
-    async with _rate_lock:
-        count, reset = _rate_data.get(ip, (0, now + window))
-        if reset < now:
-            count, reset = 0, now + window
-        if count >= settings.rate_limit_per_minute:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
-        _rate_data[ip] = (count + 1, reset)
+    # No await below, so this read-modify-write cannot interleave with
+    # another request on the event loop; no lock needed.
+    slot = _bucket_index(ip)
+    if _bucket_resets[slot] < now:
+        _bucket_counts[slot] = 0
+        _bucket_resets[slot] = now + window
+    if _bucket_counts[slot] >= settings.rate_limit_per_minute:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    _bucket_counts[slot] += 1
@@ -1,33 +1,252 @@
+import asyncio
 import base64
+import http.client
 import os
+import shutil
 import tempfile
+import threading
+import time
+import urllib.error
 import urllib.parse
 import urllib.request
 import mimetypes
+from contextlib import suppress
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Optional, Tuple
 
 from .config import settings
 
 
+_COPY_CHUNK_SIZE = 64 * 1024
+_HTTP_TIMEOUT_SECONDS = 30.0
+_MAX_IDLE_CONNECTIONS_PER_HOST = 4
+# Hosts come from client-supplied URLs, so bound the pool as a whole too.
+_MAX_IDLE_CONNECTIONS = 16
+_IDLE_TTL_SECONDS = 15.0
+# Same User-Agent urlopen sends, so servers see one client either way.
+_USER_AGENT = f"Python-urllib/{urllib.request.__version__}"
+
+# Keep-alive connections reused across image fetches, keyed by (scheme, netloc),
+# each with the monotonic time it went idle. Dict order is least recently used first.
+_IdleConnection = Tuple[float, http.client.HTTPConnection]
+_idle_connections: Dict[Tuple[str, str], List[_IdleConnection]] = {}
+_idle_lock = threading.Lock()
+
+
+@lru_cache(maxsize=128)
+def _ext_for_mime(mime: str) -> str:
+    return mimetypes.guess_extension(mime) or ".png"
+
+
+def _evict_idle_locked(now: float) -> List[http.client.HTTPConnection]:
+    """Drop expired connections and trim the pool to its global cap (LRU first).
+
+    Call with `_idle_lock` held; returns the evicted connections for the
+    caller to close once the lock is released.
+    """
+    evicted: List[http.client.HTTPConnection] = []
+    total = 0
+    for key in list(_idle_connections):
+        idle = _idle_connections[key]
+        fresh = [item for item in idle if now - item[0] < _IDLE_TTL_SECONDS]
+        evicted.extend(conn for stamp, conn in idle if now - stamp >= _IDLE_TTL_SECONDS)
+        if fresh:
+            _idle_connections[key] = fresh
+            total += len(fresh)
+        else:
+            del _idle_connections[key]
+    while total > _MAX_IDLE_CONNECTIONS:
+        key = next(iter(_idle_connections))
+        idle = _idle_connections[key]
+        evicted.append(idle.pop(0)[1])
+        total -= 1
+        if not idle:
+            del _idle_connections[key]
+    return evicted
+
+
+def _close_idle_connections() -> None:
+    """Close and forget every pooled connection."""
+    with _idle_lock:
+        conns = [conn for idle in _idle_connections.values() for _, conn in idle]
+        _idle_connections.clear()
+    for conn in conns:
+        conn.close()
+
+
+def _checkout_connection(key: Tuple[str, str]) -> Tuple[http.client.HTTPConnection, bool]:
+    """Return an idle pooled connection (reused=True) or a new one."""
+    conn: Optional[http.client.HTTPConnection] = None
+    with _idle_lock:
+        evicted = _evict_idle_locked(time.monotonic())
+        idle = _idle_connections.get(key)
+        if idle:
+            conn = idle.pop()[1]
+            if not idle:
+                del _idle_connections[key]
+    for stale in evicted:
+        stale.close()
+    if conn is not None:
+        return conn, True
+    scheme, netloc = key
+    conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    return conn_cls(netloc, timeout=_HTTP_TIMEOUT_SECONDS), False
+
+
+def _checkin_connection(key: Tuple[str, str], conn: http.client.HTTPConnection) -> None:
+    now = time.monotonic()
+    with _idle_lock:
+        # Re-insert so this host becomes the most recently used.
+        idle = _idle_connections.pop(key, [])
+        idle.append((now, conn))
+        evicted = [c for _, c in idle[:-_MAX_IDLE_CONNECTIONS_PER_HOST]]
+        _idle_connections[key] = idle[-_MAX_IDLE_CONNECTIONS_PER_HOST:]
+        evicted.extend(_evict_idle_locked(now))
+    for stale in evicted:
+        stale.close()
+
+
+def _copy_http_image(url: str, dst: BinaryIO) -> None:
+    """Stream an http(s) URL into `dst`, reusing a pooled keep-alive connection.
+
+    Proxies and redirects go through urlopen so behaviour matches a plain
+    fetch; error statuses raise HTTPError just as urlopen would.
+    """
+    parts = urllib.parse.urlsplit(url)
+    if urllib.request.getproxies().get(parts.scheme):
+        with urllib.request.urlopen(url, timeout=_HTTP_TIMEOUT_SECONDS) as resp:
+            shutil.copyfileobj(resp, dst, _COPY_CHUNK_SIZE)
+        return
+
+    key = (parts.scheme, parts.netloc)
+    # urlsplit keeps ";params" in the path, so the target matches urlopen's.
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    while True:
+        conn, reused = _checkout_connection(key)
+        try:
+            conn.request("GET", target, headers={"User-Agent": _USER_AGENT})
+            resp = conn.getresponse()
+            break
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            # A pooled socket may have been closed by the server while idle;
+            # try the next one (or a new connection). Fresh failures are real.
+            if not reused:
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+    try:
+        if 300 <= resp.status < 400:
+            conn.close()
+            with urllib.request.urlopen(url, timeout=_HTTP_TIMEOUT_SECONDS) as fallback:
+                shutil.copyfileobj(fallback, dst, _COPY_CHUNK_SIZE)
+            return
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+        shutil.copyfileobj(resp, dst, _COPY_CHUNK_SIZE)
+    except BaseException:
+        conn.close()
+        raise
+    if resp.will_close:
+        conn.close()
+    else:
+        _checkin_connection(key, conn)
+
+
 def save_image_to_temp(url: str) -> str:
     """Fetch an image URL or data URI to a temporary file and return its path."""
+    path: Optional[str] = None
     try:
         if url.startswith("data:"):
             header, b64data = url.split(",", 1)
             mime = header.split(";")[0][5:] if header.startswith("data:") else "image"
-            suffix = mimetypes.guess_extension(mime) or ".png"
-            data = base64.b64decode(b64data)
+            suffix = _ext_for_mime(mime)
+            data = memoryview(base64.b64decode(b64data))
+            # Already fully in memory: write through the raw fd, no buffered layer.
+            fd, path = tempfile.mkstemp(suffix=suffix, dir=settings.codex_workdir)
+            try:
+                while data:
+                    data = data[os.write(fd, data) :]
+            finally:
+                os.close(fd)
         else:
             parsed = urllib.parse.urlparse(url)
-            if parsed.scheme == "file":
-                with open(urllib.request.url2pathname(parsed.path), "rb") as fh:
-                    data = fh.read()
-                suffix = os.path.splitext(parsed.path)[1] or ".png"
-            else:
-                with urllib.request.urlopen(url) as resp:
-                    data = resp.read()
-                suffix = os.path.splitext(parsed.path)[1] or ".png"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=settings.codex_workdir) as f:
-            f.write(data)
-            return f.name
+            suffix = os.path.splitext(parsed.path)[1] or ".png"
+            if parsed.scheme not in ("file", "http", "https"):
+                raise ValueError(f"unsupported URL scheme {parsed.scheme!r}")
+            # Stream straight into the temp file instead of buffering the whole body.
+            with tempfile.NamedTemporaryFile(
+                delete=False, suffix=suffix, dir=settings.codex_workdir
+            ) as f:
+                path = f.name
+                if parsed.scheme == "file":
+                    with open(urllib.request.url2pathname(parsed.path), "rb") as source:
+                        shutil.copyfileobj(source, f, _COPY_CHUNK_SIZE)
+                else:
+                    _copy_http_image(url, f)
+        return path
     except Exception as e:
+        if path:
+            with suppress(OSError):
+                os.remove(path)
         raise ValueError(f"failed to load image: {e}")
+
+
+async def save_image_to_temp_async(url: str) -> str:
+    """Run `save_image_to_temp` in a worker thread so fetches don't block the loop."""
+    return await asyncio.to_thread(save_image_to_temp, url)
+
+
+def _remove_saved(results: List[object]) -> None:
+    for r in results:
+        if isinstance(r, str):
+            with suppress(OSError):
+                os.remove(r)
+
+
+async def save_images(urls: List[str]) -> List[str]:
+    """Save several images concurrently, preserving input order.
+
+    If any image fails, or the caller is cancelled, the ones that did save
+    are removed and the error is re-raised, so callers never have to clean
+    up a partial batch.
+    """
+    if not urls:
+        return []
+    limit = max(1, settings.image_save_concurrency)
+    cancelled = False
+    if len(urls) <= limit:
+        # Nothing to throttle; skip the semaphore wrapper coroutines.
+        tasks = [save_image_to_temp_async(u) for u in urls]
+    else:
+        sem = asyncio.Semaphore(limit)
+
+        async def _save(url: str) -> str:
+            async with sem:
+                if cancelled:
+                    raise asyncio.CancelledError()
+                return await save_image_to_temp_async(url)
+
+        tasks = [_save(u) for u in urls]
+
+    gathered = asyncio.gather(*tasks, return_exceptions=True)
+    try:
+        results = await asyncio.shield(gathered)
+    except asyncio.CancelledError:
+        # Worker threads can't be interrupted: stop queued saves, wait for the
+        # in-flight ones, and remove whatever they wrote before re-raising.
+        cancelled = True
+        while not gathered.done():
+            with suppress(asyncio.CancelledError):
+                await asyncio.shield(gathered)
+        _remove_saved(gathered.result())
+        raise
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        _remove_saved(results)
+        raise errors[0]
+    return list(results)
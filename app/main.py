@@ -1,15 +1,21 @@
+import asyncio
 import json
 import logging
 import os
 import sys
 import time
-import uuid
-from datetime import datetime
-from typing import AsyncIterator, List
+from typing import AsyncIterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None  # type: ignore
 
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from starlette.background import BackgroundTask
 
 from .codex import CodexError, run_codex, run_codex_last_message
 from .config import settings
@@ -21,11 +27,12 @@ from .model_registry import (
 )
 from .security import assert_local_only_or_raise
 from .prompt import build_prompt_and_images, normalize_responses_input
-from .images import save_image_to_temp
+from .images import save_images
 from .schemas import (
     ChatChoice,
     ChatCompletionRequest,
     ChatCompletionResponse,
+    ChatMessage,
     ChatMessageResponse,
     ResponsesRequest,
     ResponsesObject,
@@ -43,20 +50,56 @@ if not logger.handlers:
 app = FastAPI()
 
 _LOG_PREVIEW_LIMIT = 200
+# Dumps the whole message list in one pydantic-core call.
+_MESSAGES_ADAPTER = TypeAdapter(List[ChatMessage])
+# (model list, serialized /v1/models body); rebuilt only when the list changes.
+_MODELS_BODY_CACHE: Optional[Tuple[List[str], bytes]] = None
+_HHMMSS_CACHE: Tuple[int, str] = (-1, "")
+# Per-request policy flags as plain module booleans; refreshed on startup.
+_LOCAL_ONLY = bool(settings.local_only)
+_ALLOW_DANGER_FULL_ACCESS = bool(settings.allow_danger_full_access)
+# Keep proxies (e.g. nginx) from caching or buffering the event stream.
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive",
+}
+# SSE framing, kept as bytes so frames are a single join around JSON bytes.
+_SSE_DATA = b"data: "
+_SSE_END = b"\n\n"
+_SSE_DONE = b"data: [DONE]\n\n"
+_SSE_RESPONSE_CREATED = b"event: response.created\ndata: "
+_SSE_OUTPUT_TEXT_DELTA = b"event: response.output_text.delta\ndata: "
+_SSE_DELTA_SUFFIX = b"}\n\n"
+_SSE_OUTPUT_TEXT_DONE = b"event: response.output_text.done\ndata: "
+_SSE_RESPONSE_COMPLETED = b"event: response.completed\ndata: "
+_SSE_RESPONSE_ERROR = b"event: response.error\ndata: "
+# Pre-framed around the JSON-encoded delta text of a chat.completion.chunk.
+_CHAT_DELTA_PREFIX = b'data: {"choices":[{"delta":{"content":'
+_CHAT_DELTA_SUFFIX = b'},"index":0,"finish_reason":null}]}\n\n'
 
 
 def _now_hhmmss() -> str:
-    return datetime.now().strftime("%H%M%S")
+    global _HHMMSS_CACHE
+    sec = int(time.time())
+    cached = _HHMMSS_CACHE
+    if cached[0] != sec:
+        # One strftime per wall-clock second; the tuple swap is atomic.
+        cached = (sec, time.strftime("%H%M%S", time.localtime(sec)))
+        _HHMMSS_CACHE = cached
+    return cached[1]
 
 
 def _elapsed_ms(started_at: float) -> int:
     return int((time.perf_counter() - started_at) * 1000)
 
 
+_TRUNCATED_SUFFIX = "...(truncated, total={})".format
+
+
 def _truncate_text(text: str, limit: int = _LOG_PREVIEW_LIMIT) -> str:
-    if len(text) <= limit:
-        return text
-    return f"{text[:limit]}...(truncated, total={len(text)})"
+    n = len(text)
+    return text if n <= limit else text[:limit] + _TRUNCATED_SUFFIX(n)
 
 
 def _extract_message_text(content: object) -> str:
@@ -79,21 +122,71 @@ def _extract_message_text(content: object) -> str:
 
 def _build_request_preview(messages: List[dict]) -> str:
     previews: list[str] = []
+    # Length of " | ".join(previews), tracked instead of re-joining per item.
+    joined_len = -3
     for item in messages:
         if not isinstance(item, dict):
             continue
         role = item.get("role")
         text = _extract_message_text(item.get("content"))
         if text:
-            previews.append(f"{role}:{text}" if role else text)
-        if len(" | ".join(previews)) >= _LOG_PREVIEW_LIMIT:
+            segment = f"{role}:{text}" if role else text
+            previews.append(segment)
+            joined_len += len(segment) + 3
+        if joined_len >= _LOG_PREVIEW_LIMIT:
             break
     return _truncate_text(" | ".join(previews))
 
 
+def _json_bytes(payload: object) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _json_response(payload: object, background: Optional[BackgroundTask] = None) -> Response:
+    # Pre-serialized, so FastAPI skips jsonable_encoder and its own json.dumps.
+    return Response(
+        content=_json_bytes(payload), media_type="application/json", background=background
+    )
+
+
+def _cleanup_files(paths: List[str]) -> None:
+    for p in paths:
+        try:
+            os.remove(p)
+        except Exception:
+            pass
+
+
 def _compact_json(payload: dict) -> str:
     filtered = {k: v for k, v in payload.items() if v is not None}
-    return json.dumps(filtered, ensure_ascii=False, sort_keys=True, default=str)
+    if orjson is not None:
+        return orjson.dumps(
+            filtered,
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    return json.dumps(
+        filtered, ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":")
+    )
+
+
+class _LazyCompactJson:
+    """Log argument that runs `_compact_json` only when formatted, then reuses it."""
+
+    __slots__ = ("_payload", "_text")
+
+    def __init__(self, payload: dict) -> None:
+        self._payload = payload
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = _compact_json(self._payload)
+        return self._text
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -105,20 +198,29 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event() -> None:
+    global _LOCAL_ONLY, _ALLOW_DANGER_FULL_ACCESS
+    _LOCAL_ONLY = bool(settings.local_only)
+    _ALLOW_DANGER_FULL_ACCESS = bool(settings.allow_danger_full_access)
     await initialize_model_registry()
 
 
 @app.get("/v1/models", dependencies=[Depends(rate_limiter), Depends(verify_api_key)])
 async def list_models():
     """Return available model list."""
-    return {"data": [{"id": model} for model in get_available_models(include_reasoning_aliases=True)]}
+    global _MODELS_BODY_CACHE
+    models = get_available_models(include_reasoning_aliases=True)
+    cached = _MODELS_BODY_CACHE
+    if cached is None or cached[0] != models:
+        cached = (models, _json_bytes({"data": [{"id": model} for model in models]}))
+        _MODELS_BODY_CACHE = cached
+    return Response(content=cached[1], media_type="application/json")
 
 
 @app.post("/v1/chat/completions", dependencies=[Depends(rate_limiter), Depends(verify_api_key)])
 async def chat_completions(req: ChatCompletionRequest):
     started_at = time.perf_counter()
     called_at = _now_hhmmss()
-    message_dicts = [m.model_dump() for m in req.messages]
+    message_dicts = _MESSAGES_ADAPTER.dump_python(req.messages)
     request_params = {
         "model": req.model,
         "stream": req.stream,
@@ -134,7 +236,7 @@ async def chat_completions(req: ChatCompletionRequest):
             "chat.completions request failed status=404 called_at=%s duration_ms=%s request_params=%s error=%s",
             called_at,
             _elapsed_ms(started_at),
-            _compact_json(request_params),
+            _LazyCompactJson(request_params),
             e,
         )
         raise HTTPException(
@@ -158,56 +260,55 @@ async def chat_completions(req: ChatCompletionRequest):
             "overrides": overrides,
         }
     )
-    request_preview = _build_request_preview(message_dicts)
-    logger.info(
-        "chat.completions request started called_at=%s params=%s request_preview=%s",
-        called_at,
-        _compact_json(request_params),
-        request_preview,
-    )
+    # request_params is final from here on; serialize it at most once.
+    params_log = _LazyCompactJson(request_params)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "chat.completions request started called_at=%s params=%s request_preview=%s",
+            called_at,
+            params_log,
+            _build_request_preview(message_dicts),
+        )
 
     # Safety gate: only allow danger-full-access when explicitly enabled
     if overrides and overrides.get("sandbox") == "danger-full-access":
-        if not settings.allow_danger_full_access:
+        if not _ALLOW_DANGER_FULL_ACCESS:
             raise HTTPException(status_code=400, detail="danger-full-access is disabled by server policy")
 
     # Enforce local-only model provider when enabled
-    if settings.local_only:
+    if _LOCAL_ONLY:
         try:
             assert_local_only_or_raise()
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
-    image_paths: List[str] = []
     try:
-        for u in image_urls:
-            image_paths.append(save_image_to_temp(u))
+        image_paths = await save_images(image_urls)
     except ValueError as e:
-        for p in image_paths:
-            try:
-                os.remove(p)
-            except Exception:
-                pass
         raise HTTPException(status_code=400, detail=str(e))
 
+    # Once a response is built it owns image removal: the stream generator's
+    # finally (completion, error or disconnect), or the JSON body's background task.
+    cleanup_deferred = False
     try:
         if req.stream:
             async def event_gen() -> AsyncIterator[bytes]:
                 response_chars = 0
-                response_preview = ""
+                preview_parts: list[str] = []
+                preview_len = 0
                 stream_status = 200
+                closed = False
                 try:
-                    async for text in run_codex(prompt, overrides, image_paths, model=model_name):
+                    async for text in run_codex(
+                        prompt, overrides, image_paths, model=model_name, coalesce=settings.stream_coalesce
+                    ):
                         if text:
                             response_chars += len(text)
-                            if len(response_preview) < _LOG_PREVIEW_LIMIT:
-                                response_preview += text[: _LOG_PREVIEW_LIMIT - len(response_preview)]
-                            chunk = {
-                                "choices": [
-                                    {"delta": {"content": text}, "index": 0, "finish_reason": None}
-                                ]
-                            }
-                            yield f"data: {json.dumps(chunk)}\n\n".encode()
+                            if preview_len < _LOG_PREVIEW_LIMIT:
+                                piece = text[: _LOG_PREVIEW_LIMIT - preview_len]
+                                preview_parts.append(piece)
+                                preview_len += len(piece)
+                            yield b"".join((_CHAT_DELTA_PREFIX, _json_bytes(text), _CHAT_DELTA_SUFFIX))
                 except CodexError as e:
                     status = getattr(e, "status_code", None) or 500
                     stream_status = status
@@ -216,9 +317,9 @@ async def chat_completions(req: ChatCompletionRequest):
                         status,
                         called_at,
                         _elapsed_ms(started_at),
-                        _compact_json(request_params),
+                        params_log,
                         response_chars,
-                        _truncate_text(response_preview),
+                        "".join(preview_parts),
                         e,
                     )
                     err_obj = {
@@ -228,32 +329,57 @@ async def chat_completions(req: ChatCompletionRequest):
                             "code": None,
                         }
                     }
-                    yield f"data: {json.dumps(err_obj)}\n\n".encode()
+                    yield b"".join((_SSE_DATA, _json_bytes(err_obj), _SSE_END))
+                except (GeneratorExit, asyncio.CancelledError):
+                    # Client went away: nothing more may be yielded.
+                    closed = True
+                    raise
                 finally:
-                    logger.info(
-                        "chat.completions request completed status=%s stream=%s duration_ms=%s response_chars=%s response_preview=%s",
-                        stream_status,
-                        req.stream,
-                        _elapsed_ms(started_at),
-                        response_chars,
-                        _truncate_text(response_preview),
-                    )
-                    yield b"data: [DONE]\n\n"
-
-            return StreamingResponse(event_gen(), media_type="text/event-stream")
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(
+                            "chat.completions request completed status=%s stream=%s duration_ms=%s response_chars=%s response_preview=%s",
+                            stream_status,
+                            req.stream,
+                            _elapsed_ms(started_at),
+                            response_chars,
+                            "".join(preview_parts),
+                        )
+                    try:
+                        if not closed:
+                            yield _SSE_DONE
+                    finally:
+                        # Here rather than a BackgroundTask, which Starlette skips on disconnect;
+                        # shielded so a cancelled stream still removes the images.
+                        await asyncio.shield(asyncio.to_thread(_cleanup_files, image_paths))
+
+            response = StreamingResponse(
+                event_gen(), media_type="text/event-stream", headers=_SSE_HEADERS
+            )
+            cleanup_deferred = True
+            return response
         else:
             final = await run_codex_last_message(prompt, overrides, image_paths, model=model_name)
-            logger.info(
-                "chat.completions request completed status=200 stream=%s duration_ms=%s response_chars=%s response_preview=%s",
-                req.stream,
-                _elapsed_ms(started_at),
-                len(final),
-                _truncate_text(final),
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "chat.completions request completed status=200 stream=%s duration_ms=%s response_chars=%s response_preview=%s",
+                    req.stream,
+                    _elapsed_ms(started_at),
+                    len(final),
+                    _truncate_text(final),
+                )
+            # Server-built payload: model_construct skips re-validating our own fields.
+            resp = ChatCompletionResponse.model_construct(
+                choices=[
+                    ChatChoice.model_construct(
+                        message=ChatMessageResponse.model_construct(content=final)
+                    )
+                ]
             )
-            resp = ChatCompletionResponse(
-                choices=[ChatChoice(message=ChatMessageResponse(content=final))]
+            response = _json_response(
+                resp.model_dump(), background=BackgroundTask(_cleanup_files, image_paths)
             )
-            return resp
+            cleanup_deferred = True
+            return response
     except CodexError as e:
         status = getattr(e, "status_code", None) or 500
         logger.warning(
@@ -261,7 +387,7 @@ async def chat_completions(req: ChatCompletionRequest):
             status,
             called_at,
             _elapsed_ms(started_at),
-            _compact_json(request_params),
+            params_log,
             e,
         )
         raise HTTPException(
@@ -273,11 +399,8 @@ async def chat_completions(req: ChatCompletionRequest):
             },
         )
     finally:
-        for p in image_paths:
-            try:
-                os.remove(p)
-            except Exception:
-                pass
+        if not cleanup_deferred:
+            _cleanup_files(image_paths)
 
 
 @app.post("/v1/responses", dependencies=[Depends(rate_limiter), Depends(verify_api_key)])
@@ -297,7 +420,7 @@ async def responses_endpoint(req: ResponsesRequest):
             "responses request failed status=404 called_at=%s duration_ms=%s request_params=%s error=%s",
             called_at,
             _elapsed_ms(started_at),
-            _compact_json(request_params),
+            _LazyCompactJson(request_params),
             e,
         )
         raise HTTPException(
@@ -317,7 +440,7 @@ async def responses_endpoint(req: ResponsesRequest):
             "responses request failed status=400 called_at=%s duration_ms=%s request_params=%s error=%s",
             called_at,
             _elapsed_ms(started_at),
-            _compact_json(request_params),
+            _LazyCompactJson(request_params),
             e,
         )
         raise HTTPException(status_code=400, detail=str(e))
@@ -329,7 +452,7 @@ async def responses_endpoint(req: ResponsesRequest):
         overrides["reasoning_effort"] = req.reasoning.effort
 
     # Enforce local-only model provider when enabled
-    if settings.local_only:
+    if _LOCAL_ONLY:
         try:
             assert_local_only_or_raise()
         except ValueError as e:
@@ -337,8 +460,9 @@ async def responses_endpoint(req: ResponsesRequest):
 
     prompt, image_urls = build_prompt_and_images(messages)
 
-    resp_id = f"resp_{uuid.uuid4().hex}"
-    msg_id = f"msg_{uuid.uuid4().hex}"
+    # Same 32 hex chars as uuid4().hex, without building UUID objects.
+    resp_id = "resp_" + os.urandom(16).hex()
+    msg_id = "msg_" + os.urandom(16).hex()
     created = int(time.time())
     response_model = req.model or model
     codex_overrides = overrides or None
@@ -350,32 +474,32 @@ async def responses_endpoint(req: ResponsesRequest):
             "codex_overrides": codex_overrides,
         }
     )
-    request_preview = _build_request_preview(messages)
-    logger.info(
-        "responses request started called_at=%s params=%s request_preview=%s",
-        called_at,
-        _compact_json(request_params),
-        request_preview,
-    )
+    # request_params is final from here on; serialize it at most once.
+    params_log = _LazyCompactJson(request_params)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "responses request started called_at=%s params=%s request_preview=%s",
+            called_at,
+            params_log,
+            _build_request_preview(messages),
+        )
 
-    image_paths: List[str] = []
     try:
-        for u in image_urls:
-            image_paths.append(save_image_to_temp(u))
+        image_paths = await save_images(image_urls)
     except ValueError as e:
-        for p in image_paths:
-            try:
-                os.remove(p)
-            except Exception:
-                pass
         raise HTTPException(status_code=400, detail=str(e))
 
+    # Once a response is built it owns image removal: the stream generator's
+    # finally (completion, error or disconnect), or the JSON body's background task.
+    cleanup_deferred = False
     try:
         if req.stream:
             async def event_gen() -> AsyncIterator[bytes]:
                 response_chars = 0
-                response_preview = ""
+                preview_parts: list[str] = []
+                preview_len = 0
                 stream_status = 200
+                closed = False
                 try:
                     created_evt = {
                         "id": resp_id,
@@ -384,35 +508,48 @@ async def responses_endpoint(req: ResponsesRequest):
                         "model": response_model,
                         "status": "in_progress",
                     }
-                    yield f"event: response.created\ndata: {json.dumps(created_evt)}\n\n".encode()
+                    yield b"".join((_SSE_RESPONSE_CREATED, _json_bytes(created_evt), _SSE_END))
 
+                    # Only the text varies per delta; frame everything else once.
+                    delta_prefix = b"".join(
+                        (_SSE_OUTPUT_TEXT_DELTA, b'{"id":', _json_bytes(resp_id), b',"delta":')
+                    )
                     buf: list[str] = []
-                    async for text in run_codex(prompt, codex_overrides, image_paths, model=model):
+                    async for text in run_codex(
+                        prompt, codex_overrides, image_paths, model=model, coalesce=settings.stream_coalesce
+                    ):
                         if text:
                             response_chars += len(text)
-                            if len(response_preview) < _LOG_PREVIEW_LIMIT:
-                                response_preview += text[: _LOG_PREVIEW_LIMIT - len(response_preview)]
+                            if preview_len < _LOG_PREVIEW_LIMIT:
+                                piece = text[: _LOG_PREVIEW_LIMIT - preview_len]
+                                preview_parts.append(piece)
+                                preview_len += len(piece)
                             buf.append(text)
-                            delta_evt = {"id": resp_id, "delta": text}
-                            yield f"event: response.output_text.delta\ndata: {json.dumps(delta_evt)}\n\n".encode()
+                            yield b"".join((delta_prefix, _json_bytes(text), _SSE_DELTA_SUFFIX))
 
                     final_text = "".join(buf)
                     done_evt = {"id": resp_id, "text": final_text}
-                    yield f"event: response.output_text.done\ndata: {json.dumps(done_evt)}\n\n".encode()
-
-                    final_obj = ResponsesObject(
-                        id=resp_id,
-                        created=created,
-                        model=response_model,
-                        status="completed",
-                        output=[
-                            ResponsesMessage(
-                                id=msg_id,
-                                content=[ResponsesOutputText(text=final_text)],
-                            )
+                    yield b"".join((_SSE_OUTPUT_TEXT_DONE, _json_bytes(done_evt), _SSE_END))
+
+                    # Same shape as ResponsesObject(...).model_dump(), without the
+                    # validate-then-dump round trip for an object we only serialize.
+                    final_obj = {
+                        "id": resp_id,
+                        "object": "response",
+                        "created": created,
+                        "model": response_model,
+                        "status": "completed",
+                        "output": [
+                            {
+                                "id": msg_id,
+                                "type": "message",
+                                "role": "assistant",
+                                "content": [{"type": "output_text", "text": final_text}],
+                            }
                         ],
-                    ).model_dump()
-                    yield f"event: response.completed\ndata: {json.dumps(final_obj)}\n\n".encode()
+                        "usage": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+                    }
+                    yield b"".join((_SSE_RESPONSE_COMPLETED, _json_bytes(final_obj), _SSE_END))
                 except CodexError as e:
                     status = getattr(e, "status_code", None) or 500
                     stream_status = status
@@ -421,52 +558,67 @@ async def responses_endpoint(req: ResponsesRequest):
                         status,
                         called_at,
                         _elapsed_ms(started_at),
-                        _compact_json(request_params),
+                        params_log,
                         response_chars,
-                        _truncate_text(response_preview),
+                        "".join(preview_parts),
                         e,
                     )
                     err_evt = {"id": resp_id, "error": {"message": str(e)}}
-                    yield f"event: response.error\ndata: {json.dumps(err_evt)}\n\n".encode()
+                    yield b"".join((_SSE_RESPONSE_ERROR, _json_bytes(err_evt), _SSE_END))
+                except (GeneratorExit, asyncio.CancelledError):
+                    # Client went away: nothing more may be yielded.
+                    closed = True
+                    raise
                 finally:
-                    logger.info(
-                        "responses request completed status=%s stream=%s duration_ms=%s response_chars=%s response_preview=%s",
-                        stream_status,
-                        req.stream,
-                        _elapsed_ms(started_at),
-                        response_chars,
-                        _truncate_text(response_preview),
-                    )
-                    yield b"data: [DONE]\n\n"
-
-            headers = {
-                "Cache-Control": "no-cache",
-                "X-Accel-Buffering": "no",
-                "Connection": "keep-alive",
-            }
-            return StreamingResponse(event_gen(), media_type="text/event-stream", headers=headers)
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(
+                            "responses request completed status=%s stream=%s duration_ms=%s response_chars=%s response_preview=%s",
+                            stream_status,
+                            req.stream,
+                            _elapsed_ms(started_at),
+                            response_chars,
+                            "".join(preview_parts),
+                        )
+                    try:
+                        if not closed:
+                            yield _SSE_DONE
+                    finally:
+                        # Here rather than a BackgroundTask, which Starlette skips on disconnect;
+                        # shielded so a cancelled stream still removes the images.
+                        await asyncio.shield(asyncio.to_thread(_cleanup_files, image_paths))
+
+            response = StreamingResponse(
+                event_gen(), media_type="text/event-stream", headers=_SSE_HEADERS
+            )
+            cleanup_deferred = True
+            return response
         else:
             final = await run_codex_last_message(prompt, codex_overrides, image_paths, model=model)
-            logger.info(
-                "responses request completed status=200 stream=%s duration_ms=%s response_chars=%s response_preview=%s",
-                req.stream,
-                _elapsed_ms(started_at),
-                len(final),
-                _truncate_text(final),
-            )
-            resp = ResponsesObject(
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "responses request completed status=200 stream=%s duration_ms=%s response_chars=%s response_preview=%s",
+                    req.stream,
+                    _elapsed_ms(started_at),
+                    len(final),
+                    _truncate_text(final),
+                )
+            resp = ResponsesObject.model_construct(
                 id=resp_id,
                 created=created,
                 model=response_model,
                 status="completed",
                 output=[
-                    ResponsesMessage(
+                    ResponsesMessage.model_construct(
                         id=msg_id,
-                        content=[ResponsesOutputText(text=final)],
+                        content=[ResponsesOutputText.model_construct(text=final)],
                     )
                 ],
             )
-            return resp
+            response = _json_response(
+                resp.model_dump(), background=BackgroundTask(_cleanup_files, image_paths)
+            )
+            cleanup_deferred = True
+            return response
     except CodexError as e:
         status = getattr(e, "status_code", None) or 500
         logger.warning(
@@ -474,7 +626,7 @@ async def responses_endpoint(req: ResponsesRequest):
             status,
             called_at,
             _elapsed_ms(started_at),
-            _compact_json(request_params),
+            params_log,
             e,
         )
         raise HTTPException(
@@ -486,8 +638,5 @@ async def responses_endpoint(req: ResponsesRequest):
             },
         )
     finally:
-        for p in image_paths:
-            try:
-                os.remove(p)
-            except Exception:
-                pass
+        if not cleanup_deferred:
+            _cleanup_files(image_paths)
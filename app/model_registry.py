@@ -1,5 +1,6 @@
 """Utility helpers for discovering and caching Codex models."""
 
+import itertools
 import logging
 import os
 from typing import Dict, List, Optional, Tuple
@@ -19,25 +20,46 @@ _AVAILABLE_MODELS: List[str] = [DEFAULT_MODEL]
 _LAST_ERROR: Optional[str] = None
 _REASONING_ALIAS_MAP: Dict[str, Tuple[str, ...]] = {}
 _WARNED_LEGACY_ENV = False
+# Memoized lookups, valid while _AVAILABLE_MODELS/_REASONING_ALIAS_MAP are the
+# same objects (the registry always rebinds them rather than mutating).
+_LOOKUP_CACHE_STATE: Tuple[object, object] = (None, None)
+_CHOICE_CACHE: Dict[Optional[str], Tuple[str, Optional[str]]] = {}
+_CHOICE_CACHE_LIMIT = 256
+_PLAIN_MODELS: Optional[Tuple[str, ...]] = None
+_ALIASED_MODELS: Optional[Tuple[str, ...]] = None
+_AVAILABLE_MODELS_SET: frozenset = frozenset()
+_AVAILABLE_MODELS_DISPLAY: Optional[str] = None
+
+_LEGACY_ALIAS_NAMES = frozenset({"gpt", "local_openai"})
+# Preferred targets for generic aliases, latest stable defaults first.
+_LEGACY_ALIAS_PREFERENCES = (
+    "gpt-5.4",
+    "gpt-5.4-codex",
+    "gpt-5.3",
+    "gpt-5.3-codex",
+    "gpt-5.1",
+    "gpt-5",
+)
 
 REASONING_EFFORT_SUFFIXES = ("low", "medium", "high", "xhigh")
+_CODEX_SUFFIX = "-codex"
 
 
 def _augment_models(models: List[str]) -> List[str]:
     """Add known aliases (e.g., strip -codex) and remove duplicates."""
 
-    augmented: list[str] = []
-    seen = set()
+    # Insertion-ordered dict doubles as the ordered "seen" set.
+    augmented: Dict[str, None] = {}
+    add = augmented.setdefault
     for model in models:
-        if model and model not in seen:
-            augmented.append(model)
-            seen.add(model)
-        if model.endswith('-codex'):
-            base = model[:-6]
-            if base and base not in seen:
-                augmented.append(base)
-                seen.add(base)
-    return augmented
+        if not model:
+            continue
+        add(model)
+        if model.endswith(_CODEX_SUFFIX):
+            base = model[: -len(_CODEX_SUFFIX)]
+            if base:
+                add(base)
+    return list(augmented)
 
 
 def _default_reasoning_aliases_for_model(model: str) -> Optional[Tuple[str, ...]]:
@@ -102,17 +124,42 @@ async def initialize_model_registry() -> List[str]:
     return list(_AVAILABLE_MODELS)
 
 
+def _sync_lookup_caches() -> None:
+    global _LOOKUP_CACHE_STATE, _CHOICE_CACHE, _PLAIN_MODELS, _ALIASED_MODELS
+    global _AVAILABLE_MODELS_SET, _AVAILABLE_MODELS_DISPLAY
+
+    state = _LOOKUP_CACHE_STATE
+    if state[0] is _AVAILABLE_MODELS and state[1] is _REASONING_ALIAS_MAP:
+        return
+    _LOOKUP_CACHE_STATE = (_AVAILABLE_MODELS, _REASONING_ALIAS_MAP)
+    _CHOICE_CACHE = {}
+    _PLAIN_MODELS = None
+    _ALIASED_MODELS = None
+    _AVAILABLE_MODELS_SET = frozenset(_AVAILABLE_MODELS)
+    _AVAILABLE_MODELS_DISPLAY = None
+
+
 def get_available_models(include_reasoning_aliases: bool = False) -> List[str]:
     """Return a copy of the currently cached model list."""
 
-    models = list(_AVAILABLE_MODELS)
-    if include_reasoning_aliases and _AVAILABLE_MODELS:
-        for base, suffixes in _REASONING_ALIAS_MAP.items():
-            if base not in models:
-                continue
-            models.extend(f"{base} {suffix}" for suffix in suffixes)
-    # Preserve ordering while removing duplicates
-    return list(dict.fromkeys(models))
+    global _PLAIN_MODELS, _ALIASED_MODELS
+
+    _sync_lookup_caches()
+    if not include_reasoning_aliases:
+        if _PLAIN_MODELS is None:
+            _PLAIN_MODELS = tuple(dict.fromkeys(_AVAILABLE_MODELS))
+        return list(_PLAIN_MODELS)
+    if _ALIASED_MODELS is None:
+        available = _AVAILABLE_MODELS_SET
+        aliases = (
+            f"{base} {suffix}"
+            for base, suffixes in _REASONING_ALIAS_MAP.items()
+            if base in available
+            for suffix in suffixes
+        )
+        # Preserve ordering while removing duplicates
+        _ALIASED_MODELS = tuple(dict.fromkeys(itertools.chain(_AVAILABLE_MODELS, aliases)))
+    return list(_ALIASED_MODELS)
 
 
 def get_default_model() -> str:
@@ -124,6 +171,18 @@ def get_default_model() -> str:
 def choose_model(requested: Optional[str]) -> Tuple[str, Optional[str]]:
     """Validate the requested model name and return the model plus optional reasoning effort."""
 
+    _sync_lookup_caches()
+    cached = _CHOICE_CACHE.get(requested)
+    if cached is not None:
+        return cached
+    choice = _choose_model_uncached(requested)
+    if len(_CHOICE_CACHE) < _CHOICE_CACHE_LIMIT:
+        _CHOICE_CACHE[requested] = choice
+    return choice
+
+
+def _choose_model_uncached(requested: Optional[str]) -> Tuple[str, Optional[str]]:
+    _sync_lookup_caches()
     if requested:
         base_model, effort = _split_model_and_effort(requested)
         aliased_model = _resolve_legacy_model_alias(base_model)
@@ -131,15 +190,25 @@ def choose_model(requested: Optional[str]) -> Tuple[str, Optional[str]]:
             if effort is None and base_model.strip().lower() == "gpt":
                 effort = "low"
             return aliased_model, effort
-        if base_model in _AVAILABLE_MODELS:
+        if base_model in _AVAILABLE_MODELS_SET:
             return base_model, effort
-        available = ", ".join(get_available_models(include_reasoning_aliases=True))
         raise ValueError(
-            f"Model '{requested}' is not available. Choose one of: {available or 'none'}"
+            f"Model '{requested}' is not available. Choose one of: {_available_models_display()}"
         )
     return get_default_model(), None
 
 
+def _available_models_display() -> str:
+    global _AVAILABLE_MODELS_DISPLAY
+
+    _sync_lookup_caches()
+    if _AVAILABLE_MODELS_DISPLAY is None:
+        _AVAILABLE_MODELS_DISPLAY = (
+            ", ".join(get_available_models(include_reasoning_aliases=True)) or "none"
+        )
+    return _AVAILABLE_MODELS_DISPLAY
+
+
 def get_last_error() -> Optional[str]:
     """Return the most recent discovery error message (if any)."""
 
@@ -181,11 +250,12 @@ def _resolve_legacy_model_alias(requested_model: str) -> Optional[str]:
     """Resolve compatibility aliases used by generic OpenAI clients."""
 
     normalized = requested_model.strip().lower()
-    if normalized not in {"gpt", "local_openai"}:
+    if normalized not in _LEGACY_ALIAS_NAMES:
         return None
 
-    # Prefer latest stable defaults first for generic aliases.
-    for preferred in ("gpt-5.4", "gpt-5.4-codex", "gpt-5.3", "gpt-5.3-codex", "gpt-5.1", "gpt-5"):
-        if preferred in _AVAILABLE_MODELS:
-            return preferred
-    return get_default_model()
+    _sync_lookup_caches()
+    available = _AVAILABLE_MODELS_SET
+    return next(
+        (preferred for preferred in _LEGACY_ALIAS_PREFERENCES if preferred in available),
+        get_default_model(),
+    )
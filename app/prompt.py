@@ -1,6 +1,9 @@
 from typing import List, Dict, Any, Tuple
 
 
+_TEXT_PART_TYPES = frozenset({"text", "input_text"})
+
+
 def _content_to_text(content: Any) -> str:
     """Best-effort conversion of message `content` into plain text.
 
@@ -8,28 +11,27 @@ def _content_to_text(content: Any) -> str:
     - str → as-is
     - list of {type:"text"|"input_text", text} → join text fields
     - list of str → join
+    - None → empty string
     - any other → stringified
     """
     if isinstance(content, str):
         return content
     if isinstance(content, list):
-        # Typed parts (OpenAI-style content parts)
-        parts: List[str] = []
-        for p in content:
-            if isinstance(p, dict):
-                t = p.get("type")
-                if t in ("text", "input_text") and isinstance(p.get("text"), str):
-                    parts.append(p["text"])
-                # Ignore non-text parts (images, tool calls, etc.)
-            elif isinstance(p, str):
-                parts.append(p)
-        if parts:
-            return "".join(parts)
-    # Fallback: stringify
-    try:
-        return str(content)
-    except Exception:
-        return ""
+        # Typed parts (OpenAI-style content parts); non-text parts (images,
+        # tool calls, etc.) are ignored.
+        return "".join(
+            [
+                p if isinstance(p, str) else p["text"]
+                for p in content
+                if isinstance(p, str)
+                or (
+                    isinstance(p, dict)
+                    and p.get("type") in _TEXT_PART_TYPES
+                    and isinstance(p.get("text"), str)
+                )
+            ]
+        )
+    return "" if content is None else str(content)
 
 
 def _extract_images(content: Any) -> List[str]:
@@ -50,36 +52,40 @@ def _extract_images(content: Any) -> List[str]:
     return images
 
 
+# Prompt prefix per conversation role; any other non-system role renders as the assistant.
+_ROLE_PREFIXES = {"user": "User: ", "": "User: "}
+_SYSTEM_ROLES = frozenset({"system", "developer"})
+
+
 def build_prompt_and_images(messages: List[Dict[str, Any]]) -> Tuple[str, List[str]]:
     """Convert chat messages into a prompt string and collect image URLs."""
     system_parts: List[str] = []
-    convo: List[Dict[str, Any]] = []
+    lines: List[str] = []
     images: List[str] = []
+    add_system = system_parts.append
+    add_line = lines.append
+    role_prefix = _ROLE_PREFIXES.get
 
+    # Single pass: conversation lines are rendered as they are seen; system
+    # text is gathered separately because it always leads the prompt.
     for m in messages:
         role = (m.get("role") or "").strip().lower()
-        # Treat 'developer' as 'system' for compatibility
-        normalized_role = "system" if role == "developer" else role
         content = m.get("content")
-        images.extend(_extract_images(content))
+        if isinstance(content, list):
+            images.extend(_extract_images(content))
         text = _content_to_text(content)
-        if normalized_role == "system":
+        # Treat 'developer' as 'system' for compatibility
+        if role in _SYSTEM_ROLES:
             if text:
-                system_parts.append(text.strip())
+                add_system(text.strip())
         else:
-            convo.append({"role": normalized_role or "user", "content": text})
+            add_line(role_prefix(role, "Assistant: ") + text.strip())
 
-    lines: List[str] = []
+    add_line("Assistant:")
+    body = "\n".join(lines)
     if system_parts:
-        lines.append("\n".join(system_parts))
-        lines.append("")
-
-    for msg in convo:
-        role = "User" if msg["role"] == "user" else "Assistant"
-        lines.append(f"{role}: {msg['content'].strip()}")
-
-    lines.append("Assistant:")
-    return "\n".join(lines), images
+        return "\n".join(system_parts) + "\n\n" + body, images
+    return body, images
 
 
 def normalize_responses_input(inp: Any) -> List[Dict[str, Any]]:
@@ -95,19 +101,30 @@ def normalize_responses_input(inp: Any) -> List[Dict[str, Any]]:
         return [{"role": "user", "content": inp}]
 
     if isinstance(inp, list):
-        # list of dict with type field (content parts)
-        if inp and isinstance(inp[0], dict) and "type" in inp[0] and "role" not in inp[0]:
-            return [{"role": "user", "content": inp}]
+        if not inp:
+            return []
+        first = inp[0]
+
+        if isinstance(first, dict):
+            # list of dict with type field (content parts)
+            if "type" in first and "role" not in first:
+                return [{"role": "user", "content": inp}]
 
-        # list of dict with role/content (chat-like)
-        if all(isinstance(x, dict) and "role" in x and "content" in x for x in inp):
+            # list of dict with role/content (chat-like): validate while copying
             msgs: List[Dict[str, Any]] = []
+            append = msgs.append
             for x in inp:
-                msgs.append({"role": str(x.get("role")), "content": x.get("content")})
-            return msgs
+                if not (isinstance(x, dict) and "role" in x and "content" in x):
+                    break
+                append({"role": str(x["role"]), "content": x["content"]})
+            else:
+                return msgs
 
         # list of str → concatenate
-        if all(isinstance(x, str) for x in inp):
-            return [{"role": "user", "content": "".join(inp)}]
+        elif isinstance(first, str):
+            try:
+                return [{"role": "user", "content": "".join(inp)}]
+            except TypeError:
+                pass
 
     raise ValueError("Unsupported input format for Responses API")
@@ -10,6 +10,17 @@ except ModuleNotFoundError:  # pragma: no cover
 
 
 LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "[::1]"}
+# Anchored on purpose: the host runs up to the first "/" or ":", so userinfo
+# and backslash tricks ("evil.com\\@localhost") never parse as a local host.
+_LOCAL_URL_RE = re.compile(
+    r"^(?P<scheme>https?)://(?P<host>\[[^\]]+\]|[^/:]+)(?::\d+)?(/|$)", re.IGNORECASE
+)
+
+# (path, st_mtime_ns, st_size) of the parsed config.toml, and the parsed dict.
+_ConfigStamp = Tuple[str, int, int]
+_CONFIG_CACHE: Optional[Tuple[_ConfigStamp, dict]] = None
+# Resolved (provider_id, base_url, is_local), keyed by config stamp + OPENAI_BASE_URL.
+_LOCAL_CHECK_CACHE: Optional[Tuple[tuple, Tuple[str, Optional[str], bool]]] = None
 
 
 def _is_local_url(url: str) -> bool:
@@ -23,26 +34,54 @@ def _is_local_url(url: str) -> bool:
     u = url.strip()
     if u.startswith("unix://") or u.startswith("http+unix://"):
         return True
-    m = re.match(r"^(?P<scheme>https?)://(?P<host>\[[^\]]+\]|[^/:]+)(?::\d+)?(/|$)", u, re.IGNORECASE)
+    m = _LOCAL_URL_RE.match(u)
     if not m:
         return False
-    host = m.group("host").lower()
-    return host in LOCAL_HOSTS
+    return m.group("host").lower() in LOCAL_HOSTS
 
 
-def _load_config_toml() -> dict:
-    """Read $CODEX_HOME/config.toml (if any). Returns {} on error/missing."""
+def _config_path() -> pathlib.Path:
     home = os.getenv("CODEX_HOME") or os.path.join(os.path.expanduser("~"), ".codex")
-    path = pathlib.Path(home) / "config.toml"
-    if not path.exists():
+    return pathlib.Path(home) / "config.toml"
+
+
+def _config_stamp(path: pathlib.Path) -> Optional[_ConfigStamp]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def _invalidate_config_cache() -> None:
+    """Forget the parsed config.toml (used by tests)."""
+    global _CONFIG_CACHE, _LOCAL_CHECK_CACHE
+    _CONFIG_CACHE = None
+    _LOCAL_CHECK_CACHE = None
+
+
+def _load_config_toml(stamp: Optional[_ConfigStamp] = None) -> dict:
+    """Read $CODEX_HOME/config.toml (if any). Returns {} on error/missing.
+
+    The parsed result is reused until the file's mtime or size changes.
+    """
+    global _CONFIG_CACHE
+    if stamp is None:
+        stamp = _config_stamp(_config_path())
+    if stamp is None:
         return {}
     if tomllib is None:
         # Best-effort: treat as absent if tomllib is unavailable
         return {}
+    cached = _CONFIG_CACHE
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
     try:
-        return tomllib.loads(path.read_text())
+        config = tomllib.loads(pathlib.Path(stamp[0]).read_text())
     except Exception:
-        return {}
+        config = {}
+    _CONFIG_CACHE = (stamp, config)
+    return config
 
 
 def _resolve_provider(config: dict) -> str:
@@ -84,10 +123,19 @@ def assert_local_only_or_raise() -> None:
 
     Conservative behavior: missing/unknown config is treated as non-local.
     """
-    cfg = _load_config_toml()
-    provider_id = _resolve_provider(cfg)
-    base_url = _provider_base_url(cfg, provider_id)
-    if not base_url or not _is_local_url(base_url):
+    global _LOCAL_CHECK_CACHE
+    stamp = _config_stamp(_config_path())
+    key = (stamp, os.getenv("OPENAI_BASE_URL"))
+    cached = _LOCAL_CHECK_CACHE
+    if cached is not None and cached[0] == key:
+        provider_id, base_url, is_local = cached[1]
+    else:
+        cfg = _load_config_toml(stamp)
+        provider_id = _resolve_provider(cfg)
+        base_url = _provider_base_url(cfg, provider_id)
+        is_local = bool(base_url) and _is_local_url(base_url)
+        _LOCAL_CHECK_CACHE = (key, (provider_id, base_url, is_local))
+    if not is_local:
         raise ValueError(
             f"Non-local model provider detected: provider='{provider_id}', base_url='{base_url or 'DEFAULT/UNKNOWN'}'"
         )
@@ -0,0 +1,79 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Resolved once per session; script tests and imports of `app` share it.
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from app import codex  # noqa: E402
+
+
+class FakeStream:
+    """Async reader that hands out queued chunks, then EOF."""
+
+    def __init__(self, chunks=()) -> None:
+        self._chunks = list(chunks)
+
+    async def read(self, _size=-1):
+        # Yield like a real pipe read so concurrent readers get a turn.
+        await asyncio.sleep(0)
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+class FakeProcess:
+    """Minimal stand-in for asyncio.subprocess.Process."""
+
+    def __init__(self, returncode=0, stdout=(), stderr=()) -> None:
+        self.returncode = returncode
+        self.stdout = FakeStream(stdout)
+        self.stderr = FakeStream(stderr)
+        self.killed = False
+
+    async def communicate(self):
+        return b"", b""
+
+    async def wait(self):
+        return self.returncode
+
+    def kill(self):
+        self.killed = True
+        self.returncode = -9
+
+
+@pytest.fixture
+def fake_codex_exec(monkeypatch, tmp_path):
+    """Run Codex in tmp_path with a stub command; returns an installer for the spawn fake.
+
+    Call the returned function with `make_process(*cmd, **kwargs)`; each
+    subprocess spawn then returns whatever it builds.
+    """
+
+    monkeypatch.setattr(codex.settings, "codex_workdir", str(tmp_path))
+    monkeypatch.setattr(codex, "_build_cmd_and_env", lambda *_, **__: ["codex", "exec"])
+    monkeypatch.setattr(codex, "_build_codex_env", lambda: {})
+
+    def install(make_process):
+        async def fake_create_subprocess_exec(*cmd, **kwargs):
+            return make_process(*cmd, **kwargs)
+
+        monkeypatch.setattr(codex, "_subprocess_factory", fake_create_subprocess_exec)
+
+    return install
+
+
+@pytest.fixture(scope="module")
+def module_tmp_dir(tmp_path_factory):
+    """One numbered temp dir per test module."""
+    return tmp_path_factory.mktemp("module")
+
+
+@pytest.fixture
+def case_dir(module_tmp_dir, request):
+    """Per-test subdirectory of the module temp dir; a cheaper tmp_path."""
+    path = module_tmp_dir / request.node.name
+    path.mkdir()
+    return path
@@ -1,12 +1,9 @@
 import asyncio
-from pathlib import Path
-import sys
 
 import pytest
 
-sys.path.append(str(Path(__file__).resolve().parents[1]))
-
 from app import codex
+from conftest import FakeProcess, FakeStream
 
 
 def test_concurrency_limiter_times_out_when_all_slots_busy():
@@ -21,138 +18,103 @@ def test_concurrency_limiter_times_out_when_all_slots_busy():
     asyncio.run(_run())
 
 
-def test_run_codex_last_message_kills_process_on_timeout(monkeypatch, tmp_path):
-    monkeypatch.setattr(codex.settings, "codex_workdir", str(tmp_path))
-    monkeypatch.setattr(codex.settings, "timeout_seconds", 1)
-    monkeypatch.setattr(codex, "_build_cmd_and_env", lambda *_, **__: ["codex", "exec"])
-    monkeypatch.setattr(codex, "_build_codex_env", lambda: {})
-    monkeypatch.setattr(codex, "_WORKDIR_PATH", None)
-    monkeypatch.setattr(codex, "_WORKDIR_NEEDS_SKIP_GIT_CHECK", False)
+def test_concurrency_limiter_release_frees_slot_for_next_acquire():
+    async def _run():
+        limiter = codex._CodexConcurrencyLimiter(max_parallel=1, queue_timeout_seconds=0.01)
+        await limiter.acquire()
+        with pytest.raises(codex.CodexError):
+            await limiter.acquire()
+        limiter.release()
+        await limiter.acquire()
+        limiter.release()
 
-    killed = {"called": False}
+    asyncio.run(_run())
 
-    class FakeProcess:
-        def __init__(self) -> None:
-            self.returncode = None
 
-        async def communicate(self):
-            await asyncio.sleep(60)
+class _HangingStream:
+    async def read(self, _size=-1):
+        await asyncio.sleep(60)
+        return b""
 
-        async def wait(self):
-            self.returncode = -9
-            return -9
 
-        def kill(self):
-            killed["called"] = True
-            self.returncode = -9
+class _HangingProcess(FakeProcess):
+    """Never finishes on its own; only the proxy's timeout can end it."""
 
-    async def fake_create_subprocess_exec(*_args, **_kwargs):
-        return FakeProcess()
+    def __init__(self) -> None:
+        super().__init__(returncode=None)
+        self.stdout = _HangingStream()
+        self.stderr = _HangingStream()
 
-    monkeypatch.setattr(codex.asyncio, "create_subprocess_exec", fake_create_subprocess_exec)
+    async def communicate(self):
+        await asyncio.sleep(60)
 
-    with pytest.raises(codex.CodexError) as exc_info:
-        asyncio.run(codex.run_codex_last_message("prompt"))
-
-    assert exc_info.value.status_code == 504
-    assert killed["called"] is True
+    async def wait(self):
+        self.returncode = -9
+        return -9
 
 
-def test_run_codex_stream_kills_process_on_timeout(monkeypatch, tmp_path):
-    monkeypatch.setattr(codex.settings, "codex_workdir", str(tmp_path))
-    monkeypatch.setattr(codex.settings, "timeout_seconds", 1)
-    monkeypatch.setattr(codex, "_build_cmd_and_env", lambda *_, **__: ["codex", "exec"])
-    monkeypatch.setattr(codex, "_build_codex_env", lambda: {})
+class _RecordingStream(FakeStream):
+    def __init__(self, chunks) -> None:
+        super().__init__(chunks)
+        self.read_called = False
 
-    killed = {"called": False}
+    async def read(self, _size=-1):
+        self.read_called = True
+        return await super().read(_size)
 
-    class FakeStdout:
-        async def readline(self):
-            await asyncio.sleep(60)
-            return b""
 
-    class FakeStderr:
-        async def read(self):
-            await asyncio.sleep(60)
-            return b""
+async def _collect(**kwargs) -> list[str]:
+    return [chunk async for chunk in codex.run_codex("prompt", **kwargs)]
 
-    class FakeProcess:
-        def __init__(self) -> None:
-            self.returncode = None
-            self.stdout = FakeStdout()
-            self.stderr = FakeStderr()
 
-        async def wait(self):
-            self.returncode = -9
-            return -9
+def test_run_codex_last_message_kills_process_on_timeout(monkeypatch, fake_codex_exec):
+    monkeypatch.setattr(codex.settings, "timeout_seconds", 1)
+    monkeypatch.setattr(codex, "_WORKDIR_PATH", None)
+    monkeypatch.setattr(codex, "_WORKDIR_NEEDS_SKIP_GIT_CHECK", False)
+    proc = _HangingProcess()
+    fake_codex_exec(lambda *_, **__: proc)
 
-        def kill(self):
-            killed["called"] = True
-            self.returncode = -9
+    with pytest.raises(codex.CodexError) as exc_info:
+        asyncio.run(codex.run_codex_last_message("prompt"))
 
-    async def fake_create_subprocess_exec(*_args, **_kwargs):
-        return FakeProcess()
+    assert exc_info.value.status_code == 504
+    assert proc.killed is True
 
-    monkeypatch.setattr(codex.asyncio, "create_subprocess_exec", fake_create_subprocess_exec)
 
-    async def _collect() -> list[str]:
-        chunks: list[str] = []
-        async for chunk in codex.run_codex("prompt"):
-            chunks.append(chunk)
-        return chunks
+def test_run_codex_stream_kills_process_on_timeout(monkeypatch, fake_codex_exec):
+    monkeypatch.setattr(codex.settings, "timeout_seconds", 1)
+    proc = _HangingProcess()
+    fake_codex_exec(lambda *_, **__: proc)
 
     with pytest.raises(codex.CodexError) as exc_info:
         asyncio.run(_collect())
 
     assert exc_info.value.status_code == 504
-    assert killed["called"] is True
+    assert proc.killed is True
 
 
-def test_run_codex_stream_reads_stderr_in_parallel(monkeypatch, tmp_path):
-    monkeypatch.setattr(codex.settings, "codex_workdir", str(tmp_path))
+def test_run_codex_stream_reads_stderr_in_parallel(monkeypatch, fake_codex_exec):
     monkeypatch.setattr(codex.settings, "timeout_seconds", 5)
-    monkeypatch.setattr(codex, "_build_cmd_and_env", lambda *_, **__: ["codex", "exec"])
-    monkeypatch.setattr(codex, "_build_codex_env", lambda: {})
-
-    stderr_read = {"called": False}
-
-    class FakeStdout:
-        def __init__(self) -> None:
-            self._lines = [b"hello\n", b""]
-
-        async def readline(self):
-            await asyncio.sleep(0)
-            return self._lines.pop(0)
+    proc = FakeProcess(stdout=[b"hello\n"])
+    proc.stderr = _RecordingStream([b"metadata"])
+    fake_codex_exec(lambda *_, **__: proc)
 
-    class FakeStderr:
-        async def read(self):
-            stderr_read["called"] = True
-            await asyncio.sleep(0)
-            return b"metadata"
-
-    class FakeProcess:
-        def __init__(self) -> None:
-            self.returncode = 0
-            self.stdout = FakeStdout()
-            self.stderr = FakeStderr()
+    chunks = asyncio.run(_collect())
+    assert chunks == ["hello\n"]
+    assert proc.stderr.read_called is True
 
-        async def wait(self):
-            return 0
 
-        def kill(self):
-            self.returncode = -9
+def test_run_codex_stream_reassembles_lines_across_chunks(monkeypatch, fake_codex_exec):
+    monkeypatch.setattr(codex.settings, "timeout_seconds", 5)
+    fake_codex_exec(
+        lambda *_, **__: FakeProcess(stdout=[b"hel", b"lo\nwor", b"ld\r\n\nbye"])
+    )
 
-    async def fake_create_subprocess_exec(*_args, **_kwargs):
-        return FakeProcess()
+    assert asyncio.run(_collect()) == ["hello\n", "world\n", "\n", "bye\n"]
 
-    monkeypatch.setattr(codex.asyncio, "create_subprocess_exec", fake_create_subprocess_exec)
 
-    async def _collect() -> list[str]:
-        chunks: list[str] = []
-        async for chunk in codex.run_codex("prompt"):
-            chunks.append(chunk)
-        return chunks
+def test_run_codex_stream_coalesces_lines_from_one_read(monkeypatch, fake_codex_exec):
+    monkeypatch.setattr(codex.settings, "timeout_seconds", 5)
+    fake_codex_exec(lambda *_, **__: FakeProcess(stdout=[b"one\ntwo\nthr", b"ee\n"]))
 
-    chunks = asyncio.run(_collect())
-    assert chunks == ["hello\n"]
-    assert stderr_read["called"] is True
+    assert asyncio.run(_collect(coalesce=True)) == ["one\ntwo\n", "three\n"]
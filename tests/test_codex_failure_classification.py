@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+from app import codex
+from conftest import FakeProcess
+
+
+def test_classify_failure_prefers_json_error_message():
+    stderr = "\n".join(
+        [
+            "starting codex",
+            json.dumps({"error": {"message": "Incorrect API key provided (401)"}}),
+        ]
+    )
+
+    message, status = codex._classify_codex_failure("", stderr)
+
+    assert message == "Incorrect API key provided (401)"
+    assert status == 401
+
+
+def test_classify_failure_detects_rate_limit_line():
+    stdout = "working...\nERROR: Rate limit reached for requests\n"
+
+    message, status = codex._classify_codex_failure(stdout, "")
+
+    assert message == "ERROR: Rate limit reached for requests"
+    assert status == 429
+
+
+def test_classify_failure_only_scans_tail_lines():
+    noise = "\n".join(f"progress {i}" for i in range(codex._FAILURE_SCAN_LINES + 10))
+    stderr = "error: stale failure\n" + noise
+
+    message, status = codex._classify_codex_failure("", stderr)
+
+    assert message == f"progress {codex._FAILURE_SCAN_LINES + 9}"
+    assert status is None
+
+
+def test_classify_failure_defaults_when_empty():
+    assert codex._classify_codex_failure("", "") == ("codex execution failed", None)
+
+
+@pytest.mark.parametrize(
+    "stdout, stderr",
+    [
+        ("working\n  error: first\nmore\n", "Unauthorized request\n"),
+        ("", "starting\n\n"),
+        ("note: rate limit near\nlast line\n", ""),
+        ("p0\rp1\rError: rate limit\rdone\r\n", ""),
+    ],
+)
+def test_small_failure_shortcut_matches_line_scan(monkeypatch, stdout, stderr):
+    fast = codex._classify_codex_failure(stdout, stderr)
+    monkeypatch.setattr(codex, "_FAILURE_SMALL_INPUT_CHARS", 0)
+    assert codex._classify_codex_failure(stdout, stderr) == fast
+
+
+def test_classify_failure_keeps_stderr_error_behind_long_stdout():
+    stdout = "\n".join(f"progress line {i}" for i in range(100))
+
+    message, status = codex._classify_codex_failure(stdout, "Error: 401 Unauthorized")
+
+    assert message == "Error: 401 Unauthorized"
+    assert status == 401
+
+
+def test_classify_failure_splits_carriage_return_progress():
+    assert codex._classify_codex_failure("p0\rp1\rdone", "") == ("done", None)
+
+
+def test_run_codex_failure_is_classified_from_stdout_tail(monkeypatch, fake_codex_exec):
+    monkeypatch.setattr(codex.settings, "timeout_seconds", 5)
+
+    body = b"".join(b"line %d\n" % i for i in range(codex._RAW_STDOUT_TAIL_LINES * 4))
+    fake_codex_exec(
+        lambda *_, **__: FakeProcess(returncode=1, stdout=[body, b"ERROR: Unauthorized\n"])
+    )
+
+    async def _drain() -> None:
+        async for _ in codex.run_codex("prompt"):
+            pass
+
+    with pytest.raises(codex.CodexError) as exc_info:
+        asyncio.run(_drain())
+
+    assert str(exc_info.value) == "ERROR: Unauthorized"
+    assert exc_info.value.status_code == 401
@@ -1,4 +1,5 @@
 import json
+import os
 
 from app import codex
 
@@ -37,3 +38,50 @@ def test_parse_model_listing_infers_codex_from_plaintext():
     assert "gpt-5.1-codex-max" in models
     assert "gpt-5.1-codex-mini" in models
     assert "o4-mini-codex" not in models
+
+
+def test_parse_model_presets_reads_nested_effort_blocks():
+    raw = b"""
+    fn builtin_model_presets() -> Vec<ModelPreset> {
+        vec![
+            ModelPreset {
+                id: "gpt-5.1-codex",
+                model: "gpt-5.1-codex",
+                supported_reasoning_efforts: &[
+                    ReasoningEffortPreset { effort: ReasoningEffort::Low, description: "fast" },
+                    ReasoningEffortPreset { effort: ReasoningEffort::High, description: "deep" },
+                ],
+            },
+            ModelPreset {
+                id: "swiftfox",
+                model: "swiftfox",
+            },
+            ModelPreset {
+                id: "gpt-5.1",
+                model: "gpt-5.1",
+            },
+        ]
+    }
+    """
+
+    presets = codex._parse_model_presets(raw)
+
+    assert presets == [
+        codex.ModelPresetEntry(model="gpt-5.1-codex", effort="low"),
+        codex.ModelPresetEntry(model="gpt-5.1-codex", effort="high"),
+        codex.ModelPresetEntry(model="gpt-5.1", effort=None),
+    ]
+
+
+def test_models_from_config_reparses_after_file_changes(monkeypatch, tmp_path):
+    config_path = tmp_path / "config.toml"
+    config_path.write_text('model = "alpha"\n', encoding="utf-8")
+    monkeypatch.setattr(codex.settings, "codex_config_dir", str(tmp_path), raising=False)
+
+    assert codex._models_from_config() == ["alpha"]
+
+    config_path.write_text('model = "beta-codex"\n', encoding="utf-8")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert codex._models_from_config() == ["beta-codex", "beta"]
@@ -1,8 +1,3 @@
-from pathlib import Path
-import sys
-
-sys.path.append(str(Path(__file__).resolve().parents[1]))
-
 from app import codex
 
 
@@ -57,3 +52,50 @@ def test_user_block_is_removed():
     out = [filt.process(line) for line in lines]
     rendered = "".join(part for part in out if part)
     assert rendered.strip() == "北京今天是晴天。"
+
+
+def test_is_metadata_line_matches_known_prefixes():
+    assert codex._is_metadata_line("🌐 Searched: weather")
+    assert codex._is_metadata_line("Reasoning effort: high")
+    assert not codex._is_metadata_line("Model answers are below.")
+
+
+def test_strip_leading_symbols_skips_to_first_alnum():
+    assert codex._strip_leading_symbols("model: x") == "model: x"
+    assert codex._strip_leading_symbols("🌐 _searched") == "searched"
+    assert codex._strip_leading_symbols("• 北京") == "北京"
+    assert codex._strip_leading_symbols("-- ** --") == ""
+    assert codex._strip_leading_symbols("") == ""
+
+
+def test_json_structure_delta_ignores_braces_in_strings():
+    assert codex._json_structure_delta('{"items": [') == 2
+    assert codex._json_structure_delta('"}]", "\\"{"}') == -1
+    assert codex._json_structure_delta('{"open": "never closed {') == 1
+
+
+def test_tool_output_json_is_skipped_until_balanced():
+    filt = codex._CodexOutputFilter()
+    lines = [
+        "[2025-09-18T23:15:00] tool web.run({}) success in 120ms:\n",
+        "{\n",
+        '  "results": ["a}", "b"],\n',
+        '  "note": "unbalanced { in text"\n',
+        "}\n",
+        "Final answer.\n",
+    ]
+    out = [filt.process(line) for line in lines]
+    rendered = "".join(part for part in out if part)
+    assert rendered == "Final answer.\n"
+
+
+def test_should_consider_only_skips_inert_user_block_lines():
+    filt = codex._CodexOutputFilter()
+    assert filt.should_consider(b"anything before a user block")
+    filt.process("User instructions:")
+    assert not filt.should_consider(b"please summarise the attached report")
+    assert filt.should_consider(b"Assistant:")
+    assert filt.should_consider(b"[2025-09-18T23:15:00] CODEX")
+    assert filt.process("please summarise the attached report") is None
+    filt.process("assistant:")
+    assert filt.should_consider(b"please summarise the attached report")
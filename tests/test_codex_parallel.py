@@ -1,13 +1,38 @@
 import asyncio
+from pathlib import Path
 
 from app import codex
+from conftest import FakeProcess
 
 
-def test_run_codex_last_message_runs_in_parallel(monkeypatch, tmp_path):
+def _last_message_path(cmd) -> str:
+    """Return the --output-last-message target from a Codex command line."""
+    return cmd[cmd.index("--output-last-message") + 1]
+
+
+class _BlockingProcess(FakeProcess):
+    """Writes the last message, then holds its slot until released."""
+
+    def __init__(self, out_path: str, entered: asyncio.Semaphore, release: asyncio.Event) -> None:
+        super().__init__()
+        self._out_path = out_path
+        self._entered = entered
+        self._release = release
+
+    async def communicate(self):
+        Path(self._out_path).write_bytes(b"done")
+        self._entered.release()
+        await self._release.wait()
+        return b"", b""
+
+    def kill(self):
+        super().kill()
+        self._release.set()
+
+
+def test_run_codex_last_message_runs_in_parallel(monkeypatch, fake_codex_exec):
     """Ensure multiple Codex requests can execute concurrently."""
 
-    # Configure settings for the test environment.
-    monkeypatch.setattr(codex.settings, "codex_workdir", str(tmp_path))
     monkeypatch.setattr(codex.settings, "timeout_seconds", 5)
     monkeypatch.setattr(codex.settings, "max_parallel_requests", 2)
 
@@ -15,68 +40,36 @@ def test_run_codex_last_message_runs_in_parallel(monkeypatch, tmp_path):
         previous_limit = codex._parallel_limiter.max_parallel
         codex._parallel_limiter.configure(2)
         try:
-            monkeypatch.setattr(
-                codex, "_build_cmd_and_env", lambda *_, **__: ["codex", "exec"]
+            entered = asyncio.Semaphore(0)
+            release = asyncio.Event()
+            fake_codex_exec(
+                lambda *cmd, **_: _BlockingProcess(_last_message_path(cmd), entered, release)
             )
-            monkeypatch.setattr(codex, "_build_codex_env", lambda: {})
-
-            active = 0
-            max_active = 0
-            release_events: list[asyncio.Event] = []
-
-            async def fake_create_subprocess_exec(*cmd, **kwargs):
-                nonlocal active, max_active
-                out_path = cmd[-1]
-                release = asyncio.Event()
-                release_events.append(release)
-
-                class FakeProcess:
-                    def __init__(self) -> None:
-                        self.returncode = 0
-
-                    async def communicate(self):
-                        nonlocal active, max_active
-                        active += 1
-                        max_active = max(max_active, active)
-                        with open(out_path, "w", encoding="utf-8") as fh:
-                            fh.write("done")
-                        await release.wait()
-                        active -= 1
-                        return b"", b""
-
-                    async def wait(self):
-                        return 0
-
-                    def kill(self):
-                        release.set()
-
-                return FakeProcess()
-
-            monkeypatch.setattr(
-                codex.asyncio,
-                "create_subprocess_exec",
-                fake_create_subprocess_exec,
-            )
-
-            task1 = asyncio.create_task(codex.run_codex_last_message("prompt-one"))
-            task2 = asyncio.create_task(codex.run_codex_last_message("prompt-two"))
-
-            while len(release_events) < 2:
-                await asyncio.sleep(0)
-            while max_active < 2:
-                await asyncio.sleep(0)
 
-            # Both tasks should hold a slot concurrently when the limit is 2.
-            assert max_active == 2
+            # A failure (e.g. the readiness timeout) cancels both runs at once.
+            async with asyncio.TaskGroup() as tg:
+                task1 = tg.create_task(codex.run_codex_last_message("prompt-one"))
+                task2 = tg.create_task(codex.run_codex_last_message("prompt-two"))
 
-            for event in release_events:
-                event.set()
+                # Both processes are inside communicate() at once, and neither can
+                # leave before `release`, so the limit of 2 admitted both.
+                await asyncio.wait_for(
+                    asyncio.gather(entered.acquire(), entered.acquire()), timeout=1.0
+                )
+                release.set()
 
-            result1, result2 = await asyncio.gather(task1, task2)
-            assert result1 == "done"
-            assert result2 == "done"
-            assert max_active == 2
+            assert task1.result() == "done"
+            assert task2.result() == "done"
         finally:
             codex._parallel_limiter.configure(previous_limit)
 
     asyncio.run(_run())
+
+
+def test_read_text_mapped_normalizes_newlines(tmp_path):
+    path = tmp_path / "last.txt"
+    path.write_bytes("第一行\r\nsecond\rthird\xff".encode("utf-8") + b"\xff")
+    assert codex._read_text_mapped(str(path)) == "第一行\nsecond\nthird\xff"
+
+    path.write_bytes(b"")
+    assert codex._read_text_mapped(str(path)) == ""
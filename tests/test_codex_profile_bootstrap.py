@@ -1,119 +1,108 @@
 import logging
+import shutil
 
 import pytest
 
+from app import codex
 from app.codex import apply_codex_profile_overrides
 from app.config import settings
 
 
 @pytest.fixture
-def restore_settings():
-    original_profile_dir = settings.codex_profile_dir
-    original_config_dir = settings.codex_config_dir
-    yield
-    settings.codex_profile_dir = original_profile_dir
-    settings.codex_config_dir = original_config_dir
-
-
-def test_apply_codex_profile_overrides_noop_when_missing(tmp_path, restore_settings, monkeypatch):
-    profile_dir = tmp_path / "missing"
-    codex_home = tmp_path / "home"
-
-    monkeypatch.setattr(settings, "codex_profile_dir", str(profile_dir))
-    monkeypatch.setattr(settings, "codex_config_dir", str(codex_home))
-
-    apply_codex_profile_overrides()
-
-    assert not (codex_home / "AGENTS.md").exists()
-    assert not (codex_home / "config.toml").exists()
-
-
-def test_apply_codex_profile_overrides_copies_present_files(tmp_path, restore_settings, monkeypatch):
-    profile_dir = tmp_path / "profile"
-    profile_dir.mkdir()
-    (profile_dir / "codex_agents.md").write_text("agent directives", encoding="utf-8")
-    (profile_dir / "codex_config.toml").write_text(
-        "model = \"demo\"\n", encoding="utf-8"
-    )
-
-    codex_home = tmp_path / "home"
-
-    monkeypatch.setattr(settings, "codex_profile_dir", str(profile_dir))
-    monkeypatch.setattr(settings, "codex_config_dir", str(codex_home))
-
-    apply_codex_profile_overrides()
-
-    agents_path = codex_home / "AGENTS.md"
-    config_path = codex_home / "config.toml"
-    assert agents_path.read_text(encoding="utf-8") == "agent directives"
-    assert config_path.read_text(encoding="utf-8") == "model = \"demo\"\n"
-
-
-def test_apply_codex_profile_overrides_partial_copy(tmp_path, restore_settings, monkeypatch):
-    profile_dir = tmp_path / "profile"
-    profile_dir.mkdir()
-    (profile_dir / "codex_agents.md").write_text("only agent", encoding="utf-8")
-
-    codex_home = tmp_path / "home"
-
+def profile_env(case_dir, monkeypatch):
+    """Point the profile and Codex home settings at fresh dirs under case_dir."""
+    profile_dir = case_dir / "profile"
+    codex_home = case_dir / "home"
     monkeypatch.setattr(settings, "codex_profile_dir", str(profile_dir))
     monkeypatch.setattr(settings, "codex_config_dir", str(codex_home))
-
-    apply_codex_profile_overrides()
-
-    agents_path = codex_home / "AGENTS.md"
-    assert agents_path.read_text(encoding="utf-8") == "only agent"
-    assert not (codex_home / "config.toml").exists()
-
-
-def test_apply_codex_profile_overrides_supports_legacy_names(
-    tmp_path, restore_settings, monkeypatch, caplog
+    return profile_dir, codex_home
+
+
+@pytest.mark.parametrize(
+    ("profile_files", "expected_agents", "expected_config", "expected_warnings"),
+    [
+        pytest.param(None, None, None, [], id="noop-when-missing"),
+        pytest.param(
+            {"codex_agents.md": "agent directives", "codex_config.toml": 'model = "demo"\n'},
+            "agent directives",
+            'model = "demo"\n',
+            [],
+            id="copies-present-files",
+        ),
+        pytest.param(
+            {"codex_agents.md": "only agent"},
+            "only agent",
+            None,
+            [],
+            id="partial-copy",
+        ),
+        pytest.param(
+            {"agent.md": "legacy agent", "config.toml": "legacy = true\n"},
+            "legacy agent",
+            "legacy = true\n",
+            ["legacy filename 'agent.md'", "legacy filename 'config.toml'"],
+            id="supports-legacy-names",
+        ),
+        pytest.param(
+            {
+                "codex_agents.md": "primary",
+                "codex_config.toml": "value = 1\n",
+                # Legacy files with different content are ignored when primary files exist.
+                "agent.md": "legacy",
+                "config.toml": "value = 2\n",
+            },
+            "primary",
+            "value = 1\n",
+            [],
+            id="prefers-primary-over-legacy",
+        ),
+    ],
+)
+def test_apply_codex_profile_overrides(
+    profile_env, caplog, profile_files, expected_agents, expected_config, expected_warnings
 ):
-    profile_dir = tmp_path / "profile"
-    profile_dir.mkdir()
-    (profile_dir / "agent.md").write_text("legacy agent", encoding="utf-8")
-    (profile_dir / "config.toml").write_text("legacy = true\n", encoding="utf-8")
-
-    codex_home = tmp_path / "home"
-
-    monkeypatch.setattr(settings, "codex_profile_dir", str(profile_dir))
-    monkeypatch.setattr(settings, "codex_config_dir", str(codex_home))
+    profile_dir, codex_home = profile_env
+    if profile_files is not None:
+        profile_dir.mkdir()
+        for name, content in profile_files.items():
+            (profile_dir / name).write_text(content, encoding="utf-8")
 
-    with caplog.at_level(logging.WARNING):
+    with caplog.at_level(logging.INFO):
         apply_codex_profile_overrides()
 
-    agents_path = codex_home / "AGENTS.md"
-    config_path = codex_home / "config.toml"
-    assert agents_path.read_text(encoding="utf-8") == "legacy agent"
-    assert config_path.read_text(encoding="utf-8") == "legacy = true\n"
+    for path, expected in (
+        (codex_home / "AGENTS.md", expected_agents),
+        (codex_home / "config.toml", expected_config),
+    ):
+        if expected is None:
+            assert not path.exists()
+        else:
+            assert path.read_text(encoding="utf-8") == expected
+
     warnings = [record.message for record in caplog.records if record.levelno >= logging.WARNING]
-    assert any("legacy filename 'agent.md'" in msg for msg in warnings)
-    assert any("legacy filename 'config.toml'" in msg for msg in warnings)
+    if expected_warnings:
+        for fragment in expected_warnings:
+            assert any(fragment in msg for msg in warnings)
+    else:
+        assert not warnings
 
 
-def test_apply_codex_profile_overrides_prefers_primary_over_legacy(
-    tmp_path, restore_settings, monkeypatch, caplog
-):
-    profile_dir = tmp_path / "profile"
-    profile_dir.mkdir()
-    (profile_dir / "codex_agents.md").write_text("primary", encoding="utf-8")
-    (profile_dir / "codex_config.toml").write_text("value = 1\n", encoding="utf-8")
-    # Legacy files with different content should be ignored when primary files exist.
-    (profile_dir / "agent.md").write_text("legacy", encoding="utf-8")
-    (profile_dir / "config.toml").write_text("value = 2\n", encoding="utf-8")
+def test_copy_file_refuses_to_copy_onto_itself(case_dir):
+    config = case_dir / "config.toml"
+    config.write_text('model = "keep"\n', encoding="utf-8")
 
-    codex_home = tmp_path / "home"
+    with pytest.raises(shutil.SameFileError):
+        codex._copy_file(config, config)
 
-    monkeypatch.setattr(settings, "codex_profile_dir", str(profile_dir))
-    monkeypatch.setattr(settings, "codex_config_dir", str(codex_home))
+    assert config.read_text(encoding="utf-8") == 'model = "keep"\n'
 
-    with caplog.at_level(logging.INFO):
-        apply_codex_profile_overrides()
 
-    agents_path = codex_home / "AGENTS.md"
-    config_path = codex_home / "config.toml"
-    assert agents_path.read_text(encoding="utf-8") == "primary"
-    assert config_path.read_text(encoding="utf-8") == "value = 1\n"
-    # No warnings expected because only primary filenames should be used.
-    warnings = [record for record in caplog.records if record.levelno >= logging.WARNING]
-    assert not warnings
+def test_copy_file_replaces_longer_destination(case_dir):
+    src = case_dir / "src.md"
+    dst = case_dir / "dst.md"
+    src.write_text("new", encoding="utf-8")
+    dst.write_text("much longer old content", encoding="utf-8")
+
+    codex._copy_file(src, dst)
+
+    assert dst.read_text(encoding="utf-8") == "new"
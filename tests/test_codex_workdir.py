@@ -1,29 +1,55 @@
+import os
 from pathlib import Path
 
+import pytest
+
 from app import codex
 
 
-def test_codex_workdir_fallback_when_not_writable(monkeypatch, tmp_path):
-    """Fallback to a writable directory when configured workdir lacks permissions."""
+# Owner of each attribute the workdir tests patch, resolved once at import.
+_PATCH_OWNERS = {
+    "codex_workdir": codex.settings,
+    "codex_config_dir": codex.settings,
+    "_WORKDIR_PATH": codex,
+    "_WORKDIR_NEEDS_SKIP_GIT_CHECK": codex,
+    "_CODEX_ENV_CACHE": codex,
+    "_verify_directory_write_access": codex,
+    "_resolve_codex_executable": codex,
+    "gettempdir": codex.tempfile,
+    "home": codex.Path,
+}
+
+
+def _patch_codex(monkeypatch, **overrides) -> None:
+    for name, value in overrides.items():
+        monkeypatch.setattr(_PATCH_OWNERS[name], name, value, raising=False)
 
-    requested = tmp_path / "readonly"
-    requested.mkdir()
 
+def _reject_writes_to(*read_only: Path):
+    """Return a _verify_directory_write_access that fails for `read_only` dirs."""
     original_verify = codex._verify_directory_write_access
 
     def fake_verify(directory: Path) -> None:
-        if directory == requested:
+        if directory in read_only:
             raise PermissionError("read-only")
         original_verify(directory)
 
-    monkeypatch.setattr(
-        codex, "_verify_directory_write_access", fake_verify, raising=False
-    )
-    monkeypatch.setattr(
-        codex.settings, "codex_workdir", str(requested), raising=False
+    return fake_verify
+
+
+def test_codex_workdir_fallback_when_not_writable(monkeypatch, case_dir):
+    """Fallback to a writable directory when configured workdir lacks permissions."""
+
+    requested = case_dir / "readonly"
+    requested.mkdir()
+
+    _patch_codex(
+        monkeypatch,
+        _verify_directory_write_access=_reject_writes_to(requested),
+        codex_workdir=str(requested),
+        _WORKDIR_PATH=None,
+        _WORKDIR_NEEDS_SKIP_GIT_CHECK=False,
     )
-    monkeypatch.setattr(codex, "_WORKDIR_PATH", None, raising=False)
-    monkeypatch.setattr(codex, "_WORKDIR_NEEDS_SKIP_GIT_CHECK", False, raising=False)
 
     codex._ensure_workdir_exists()
 
@@ -36,32 +62,22 @@ def test_codex_workdir_fallback_when_not_writable(monkeypatch, tmp_path):
     probe.unlink()
 
 
-def test_skip_git_repo_flag_added_when_workdir_not_repo(monkeypatch, tmp_path):
+def test_skip_git_repo_flag_added_when_workdir_not_repo(monkeypatch, case_dir):
     """Ensure CLI command opts out of Git repo check if workdir lacks .git."""
 
-    requested = tmp_path / "readonly"
+    requested = case_dir / "readonly"
     requested.mkdir()
-    fallback_root = tmp_path / "fallback"
+    fallback_root = case_dir / "fallback"
     fallback_root.mkdir()
 
-    original_verify = codex._verify_directory_write_access
-
-    def fake_verify(directory: Path) -> None:
-        if directory == requested:
-            raise PermissionError("read-only")
-        original_verify(directory)
-
-    monkeypatch.setattr(
-        codex, "_verify_directory_write_access", fake_verify, raising=False
-    )
-    monkeypatch.setattr(codex, "_resolve_codex_executable", lambda: "codex-bin")
-    monkeypatch.setattr(
-        codex.settings, "codex_workdir", str(requested), raising=False
-    )
-    monkeypatch.setattr(codex, "_WORKDIR_PATH", None, raising=False)
-    monkeypatch.setattr(codex, "_WORKDIR_NEEDS_SKIP_GIT_CHECK", False, raising=False)
-    monkeypatch.setattr(
-        codex.tempfile, "gettempdir", lambda: str(fallback_root), raising=False
+    _patch_codex(
+        monkeypatch,
+        _verify_directory_write_access=_reject_writes_to(requested),
+        _resolve_codex_executable=lambda: "codex-bin",
+        codex_workdir=str(requested),
+        _WORKDIR_PATH=None,
+        _WORKDIR_NEEDS_SKIP_GIT_CHECK=False,
+        gettempdir=lambda: str(fallback_root),
     )
 
     cmd = codex._build_cmd_and_env("prompt")
@@ -71,31 +87,29 @@ def test_skip_git_repo_flag_added_when_workdir_not_repo(monkeypatch, tmp_path):
     assert "--skip-git-repo-check" in cmd
 
 
-def test_codex_home_fallback_when_default_not_writable(monkeypatch, tmp_path):
+def test_codex_home_fallback_when_default_not_writable(monkeypatch, case_dir):
     """Fallback to a writable CODEX_HOME when default locations are read-only."""
 
-    env_home = tmp_path / "env-home"
+    env_home = case_dir / "env-home"
     env_home.mkdir()
-    user_home = tmp_path / "user-home"
+    user_home = case_dir / "user-home"
     user_home.mkdir()
-    workspace_home = tmp_path / "workspace-home"
+    workspace_home = case_dir / "workspace-home"
     workspace_home.mkdir()
-    fallback_root = tmp_path / "fallback-root"
+    fallback_root = case_dir / "fallback-root"
     fallback_root.mkdir()
 
-    original_verify = codex._verify_directory_write_access
-
-    def fake_verify(directory: Path) -> None:
-        if directory in (env_home, user_home / ".codex", workspace_home / ".codex"):
-            raise PermissionError("read-only")
-        original_verify(directory)
-
     monkeypatch.setenv("CODEX_HOME", str(env_home))
-    monkeypatch.setattr(codex.settings, "codex_config_dir", None, raising=False)
-    monkeypatch.setattr(codex.settings, "codex_workdir", str(workspace_home), raising=False)
-    monkeypatch.setattr(codex.tempfile, "gettempdir", lambda: str(fallback_root), raising=False)
-    monkeypatch.setattr(codex.Path, "home", staticmethod(lambda: user_home), raising=False)
-    monkeypatch.setattr(codex, "_verify_directory_write_access", fake_verify, raising=False)
+    _patch_codex(
+        monkeypatch,
+        codex_config_dir=None,
+        codex_workdir=str(workspace_home),
+        gettempdir=lambda: str(fallback_root),
+        home=staticmethod(lambda: user_home),
+        _verify_directory_write_access=_reject_writes_to(
+            env_home, user_home / ".codex", workspace_home / ".codex"
+        ),
+    )
 
     env = codex._build_codex_env()
 
@@ -104,21 +118,122 @@ def test_codex_home_fallback_when_default_not_writable(monkeypatch, tmp_path):
     assert codex.settings.codex_config_dir == str(expected_home)
 
 
-def test_codex_home_prefers_user_home_before_workspace(monkeypatch, tmp_path):
+def test_codex_home_prefers_user_home_before_workspace(monkeypatch, case_dir):
     """Prefer ~/.codex when no explicit CODEX_HOME/CODEX_CONFIG_DIR is provided."""
 
-    fake_home = tmp_path / "user-home"
+    fake_home = case_dir / "user-home"
     fake_home.mkdir()
-    workspace_home = tmp_path / "workspace-home"
+    workspace_home = case_dir / "workspace-home"
     workspace_home.mkdir()
 
     monkeypatch.delenv("CODEX_HOME", raising=False)
-    monkeypatch.setattr(codex.settings, "codex_config_dir", None, raising=False)
-    monkeypatch.setattr(codex.settings, "codex_workdir", str(workspace_home), raising=False)
-    monkeypatch.setattr(codex.Path, "home", staticmethod(lambda: fake_home), raising=False)
+    _patch_codex(
+        monkeypatch,
+        codex_config_dir=None,
+        codex_workdir=str(workspace_home),
+        home=staticmethod(lambda: fake_home),
+    )
 
     env = codex._build_codex_env()
 
     expected_home = fake_home / ".codex"
     assert env["CODEX_HOME"] == str(expected_home)
     assert codex.settings.codex_config_dir == str(expected_home)
+
+
+def test_codex_env_is_reused_until_settings_change(monkeypatch, case_dir):
+    """Skip CODEX_HOME probing when nothing the env depends on has changed."""
+
+    codex_home = case_dir / "codex-home"
+    # setenv first so monkeypatch restores CODEX_HOME after the code under test sets it.
+    monkeypatch.setenv("CODEX_HOME", "")
+    monkeypatch.delenv("CODEX_HOME")
+    _patch_codex(
+        monkeypatch,
+        _CODEX_ENV_CACHE=None,
+        codex_config_dir=str(codex_home),
+        codex_workdir=str(case_dir),
+    )
+
+    calls = {"count": 0}
+    original_resolve = codex._resolve_codex_home_dir
+
+    def counting_resolve() -> Path:
+        calls["count"] += 1
+        return original_resolve()
+
+    monkeypatch.setattr(codex, "_resolve_codex_home_dir", counting_resolve)
+
+    first = codex._build_codex_env()
+    second = codex._build_codex_env()
+    third = codex._build_codex_env()
+
+    assert first == second == third
+    assert third["CODEX_HOME"] == str(codex_home)
+    assert calls["count"] == 1
+
+    other_home = case_dir / "other-home"
+    _patch_codex(monkeypatch, codex_config_dir=str(other_home))
+    assert codex._build_codex_env()["CODEX_HOME"] == str(other_home)
+    assert codex._build_codex_env()["CODEX_HOME"] == str(other_home)
+    assert calls["count"] == 2
+
+
+def test_verified_directories_are_not_probed_again(monkeypatch, case_dir):
+    monkeypatch.setattr(codex, "_VERIFIED_WRITABLE_DIRS", set())
+    probes = []
+    real_access = codex.os.access
+
+    def counting_access(path, mode):
+        probes.append(path)
+        return real_access(path, mode)
+
+    monkeypatch.setattr(codex.os, "access", counting_access)
+
+    codex._verify_directory_write_access(case_dir)
+    codex._verify_directory_write_access(case_dir)
+    assert probes == [case_dir]
+
+    missing = case_dir / "missing"
+    for _ in range(2):
+        with pytest.raises(PermissionError):
+            codex._verify_directory_write_access(missing)
+    # Failures are re-probed every time.
+    assert probes == [case_dir, missing, missing]
+
+
+def test_write_probe_leaves_existing_file_alone(monkeypatch, case_dir):
+    monkeypatch.setattr(codex, "_VERIFIED_WRITABLE_DIRS", set())
+    # Force the fallback probe, as when os.access misreads Windows ACLs.
+    monkeypatch.setattr(codex.os, "access", lambda *_: False)
+
+    fresh = case_dir / "fresh"
+    fresh.mkdir()
+    codex._verify_directory_write_access(fresh)
+    assert list(fresh.iterdir()) == []
+
+    existing = case_dir / "existing"
+    existing.mkdir()
+    (existing / ".codex-perm").write_text("keep")
+    codex._verify_directory_write_access(existing)
+    assert (existing / ".codex-perm").read_text() == "keep"
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "geteuid") or os.geteuid() == 0,
+    reason="needs POSIX permissions that apply to the current user",
+)
+def test_write_probe_rejects_read_only_dir_with_stale_probe(monkeypatch, case_dir):
+    monkeypatch.setattr(codex, "_VERIFIED_WRITABLE_DIRS", set())
+    monkeypatch.setattr(codex.os, "access", lambda *_: False)
+
+    read_only = case_dir / "read-only"
+    read_only.mkdir()
+    (read_only / ".codex-perm").write_text("stale")
+    read_only.chmod(0o555)
+    try:
+        with pytest.raises(PermissionError):
+            codex._verify_directory_write_access(read_only)
+    finally:
+        read_only.chmod(0o755)
+    assert str(read_only) not in codex._VERIFIED_WRITABLE_DIRS
@@ -0,0 +1,255 @@
+import asyncio
+import base64
+import os
+
+import pytest
+
+from app import images
+
+
+def test_save_image_to_temp_streams_file_url(monkeypatch, tmp_path):
+    monkeypatch.setattr(images.settings, "codex_workdir", str(tmp_path), raising=False)
+    source = tmp_path / "source.jpg"
+    payload = bytes(range(256)) * 1024
+    source.write_bytes(payload)
+
+    saved = images.save_image_to_temp(source.as_uri())
+
+    assert saved.endswith(".jpg")
+    with open(saved, "rb") as fh:
+        assert fh.read() == payload
+
+
+def test_save_image_to_temp_decodes_data_uri(monkeypatch, tmp_path):
+    monkeypatch.setattr(images.settings, "codex_workdir", str(tmp_path), raising=False)
+    url = "data:image/png;base64," + base64.b64encode(b"png-bytes").decode()
+
+    saved = images.save_image_to_temp(url)
+
+    assert saved.endswith(".png")
+    with open(saved, "rb") as fh:
+        assert fh.read() == b"png-bytes"
+
+
+def test_save_image_to_temp_removes_partial_file_on_failure(monkeypatch, tmp_path):
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    monkeypatch.setattr(images.settings, "codex_workdir", str(workdir), raising=False)
+
+    def broken_copy(_src, _dst, _length=0):
+        raise OSError("connection reset")
+
+    monkeypatch.setattr(images.shutil, "copyfileobj", broken_copy)
+    source = tmp_path / "source.png"
+    source.write_bytes(b"data")
+
+    with pytest.raises(ValueError):
+        images.save_image_to_temp(source.as_uri())
+
+    assert list(workdir.iterdir()) == []
+
+
+def test_save_images_keeps_order_and_cleans_up_on_failure(monkeypatch, tmp_path):
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    monkeypatch.setattr(images.settings, "codex_workdir", str(workdir), raising=False)
+    first = tmp_path / "a.png"
+    second = tmp_path / "b.jpg"
+    first.write_bytes(b"a")
+    second.write_bytes(b"b")
+
+    saved = asyncio.run(images.save_images([first.as_uri(), second.as_uri()]))
+    assert [os.path.splitext(p)[1] for p in saved] == [".png", ".jpg"]
+    for p in saved:
+        os.remove(p)
+
+    missing = (tmp_path / "missing.png").as_uri()
+    with pytest.raises(ValueError):
+        asyncio.run(images.save_images([first.as_uri(), missing, second.as_uri()]))
+    assert list(workdir.iterdir()) == []
+
+
+def test_http_images_reuse_a_keep_alive_connection(monkeypatch, tmp_path):
+    import http.server
+    import threading
+
+    monkeypatch.setattr(images.settings, "codex_workdir", str(tmp_path), raising=False)
+    monkeypatch.setattr(images, "_idle_connections", {})
+    monkeypatch.setattr(images.urllib.request, "getproxies", lambda: {})
+    connections = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_GET(self):
+            body = self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        first = images.save_image_to_temp(f"{base}/a.png?x=1")
+        second = images.save_image_to_temp(f"{base}/b.jpg")
+    finally:
+        server.shutdown()
+        server.server_close()
+        images._close_idle_connections()
+
+    with open(first, "rb") as fh:
+        assert fh.read() == b"/a.png?x=1"
+    with open(second, "rb") as fh:
+        assert fh.read() == b"/b.jpg"
+    assert second.endswith(".jpg")
+    assert len(connections) == 1
+
+
+def test_http_images_match_urlopen_requests_and_errors(monkeypatch, tmp_path):
+    import http.server
+    import threading
+
+    monkeypatch.setattr(images.settings, "codex_workdir", str(tmp_path), raising=False)
+    monkeypatch.setattr(images, "_idle_connections", {})
+    monkeypatch.setattr(images.urllib.request, "getproxies", lambda: {})
+    seen = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            seen.append((self.path, self.headers.get("User-Agent")))
+            if self.path.startswith("/missing"):
+                self.send_response(404)
+                body = b""
+            elif self.path.startswith("/moved"):
+                self.send_response(302)
+                self.send_header("Location", "/img.png;v=2?x=1")
+                body = b""
+            else:
+                self.send_response(200)
+                body = self.path.encode()
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        direct = images.save_image_to_temp(f"{base}/img.png;v=2?x=1")
+        with pytest.raises(ValueError, match="404"):
+            images.save_image_to_temp(f"{base}/missing.png")
+        redirected = images.save_image_to_temp(f"{base}/moved.png")
+    finally:
+        server.shutdown()
+        server.server_close()
+        images._close_idle_connections()
+
+    for path in (direct, redirected):
+        with open(path, "rb") as fh:
+            assert fh.read() == b"/img.png;v=2?x=1"
+    assert [p for p, _ in seen] == [
+        "/img.png;v=2?x=1",
+        "/missing.png",
+        "/moved.png",
+        "/moved.png",
+        "/img.png;v=2?x=1",
+    ]
+    assert {ua for _, ua in seen} == {images._USER_AGENT}
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_save_images_respects_concurrency_setting(monkeypatch):
+    monkeypatch.setattr(images.settings, "image_save_concurrency", 2, raising=False)
+    active = 0
+    peak = 0
+
+    async def fake_save(url):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return url
+
+    monkeypatch.setattr(images, "save_image_to_temp_async", fake_save)
+
+    urls = [f"u{i}" for i in range(5)]
+    assert asyncio.run(images.save_images(urls)) == urls
+    assert peak == 2
+
+
+def test_save_images_cleans_up_in_flight_saves_on_cancel(monkeypatch, tmp_path):
+    import threading
+
+    monkeypatch.setattr(images.settings, "image_save_concurrency", 2, raising=False)
+    started = []
+    release = threading.Event()
+
+    def slow_save(url):
+        started.append(url)
+        release.wait(5)
+        path = tmp_path / f"{url}.png"
+        path.write_bytes(b"x")
+        return str(path)
+
+    monkeypatch.setattr(images, "save_image_to_temp", slow_save)
+
+    async def main():
+        task = asyncio.create_task(images.save_images(["a", "b", "c"]))
+        while len(started) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.sleep(0.01)
+        # Still waiting on the in-flight saves rather than returning early.
+        assert not task.done()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert sorted(started) == ["a", "b"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_idle_connection_pool_is_bounded(monkeypatch):
+    monkeypatch.setattr(images, "_idle_connections", {})
+    monkeypatch.setattr(images, "_MAX_IDLE_CONNECTIONS", 3)
+
+    class FakeConnection:
+        def __init__(self):
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    conns = [FakeConnection() for _ in range(10)]
+    for port, conn in enumerate(conns):
+        images._checkin_connection(("http", f"host:{port}"), conn)
+    # The least recently used hosts went first.
+    assert list(images._idle_connections) == [("http", f"host:{port}") for port in (7, 8, 9)]
+    assert [c.closed for c in conns] == [True] * 7 + [False] * 3
+
+    for _ in range(6):
+        images._checkin_connection(("http", "host:9"), FakeConnection())
+    assert sum(len(idle) for idle in images._idle_connections.values()) == 3
+    assert len(images._idle_connections[("http", "host:9")]) == 3
+
+    monkeypatch.setattr(images, "_IDLE_TTL_SECONDS", 0.0)
+    conn, reused = images._checkout_connection(("http", "host:9"))
+    assert not reused
+    conn.close()
+    assert images._idle_connections == {}
@@ -1,34 +1,58 @@
+import shlex
 import subprocess
 from pathlib import Path
 
+import pytest
 
-ROOT = Path(__file__).resolve().parents[1]
-SCRIPT = ROOT / "scripts" / "trim_log.sh"
+from conftest import REPO_ROOT
 
 
-def _run_trim(log_file: Path, max_bytes: int, keep_bytes: int) -> None:
-    subprocess.run(
-        ["bash", str(SCRIPT), str(log_file), str(max_bytes), str(keep_bytes)],
-        cwd=ROOT,
-        check=True,
+SCRIPT = REPO_ROOT / "scripts" / "trim_log.sh"
+
+
+@pytest.fixture(scope="module")
+def trim_shell():
+    """One bash for the whole module; each trim runs the script in a subshell."""
+    shell = subprocess.Popen(
+        ["bash"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        cwd=REPO_ROOT,
+        text=True,
     )
+    yield shell
+    shell.stdin.close()
+    shell.wait(timeout=5)
+
+
+def _run_trim(shell: subprocess.Popen, log_file: Path, max_bytes: int, keep_bytes: int) -> None:
+    args = " ".join(shlex.quote(str(arg)) for arg in (log_file, max_bytes, keep_bytes))
+    # Sourcing inside ( ... ) forks without exec'ing a new bash; `exit` and the
+    # script's EXIT trap stay confined to the subshell.
+    shell.stdin.write(f"( set -- {args}; . {shlex.quote(str(SCRIPT))} ); echo \"__rc=$?\"\n")
+    shell.stdin.flush()
+    for line in shell.stdout:
+        if line.startswith("__rc="):
+            assert line == "__rc=0\n"
+            return
+    raise AssertionError("trim shell exited unexpectedly")
 
 
-def test_trim_log_keeps_file_when_under_limit(tmp_path: Path) -> None:
+def test_trim_log_keeps_file_when_under_limit(trim_shell, tmp_path: Path) -> None:
     log_file = tmp_path / "stderr.log"
     log_file.write_text("hello\n", encoding="utf-8")
 
-    _run_trim(log_file, max_bytes=50, keep_bytes=20)
+    _run_trim(trim_shell, log_file, max_bytes=50, keep_bytes=20)
 
     assert log_file.read_text(encoding="utf-8") == "hello\n"
 
 
-def test_trim_log_keeps_tail_when_over_limit(tmp_path: Path) -> None:
+def test_trim_log_keeps_tail_when_over_limit(trim_shell, tmp_path: Path) -> None:
     log_file = tmp_path / "stderr.log"
     content = "".join(str(i % 10) for i in range(200))
     log_file.write_text(content, encoding="utf-8")
 
-    _run_trim(log_file, max_bytes=50, keep_bytes=20)
+    _run_trim(trim_shell, log_file, max_bytes=50, keep_bytes=20)
 
     trimmed = log_file.read_text(encoding="utf-8")
     assert len(trimmed) == 20
@@ -1,4 +1,5 @@
 import asyncio
+import json
 import logging
 import re
 import sys
@@ -7,7 +8,26 @@ import pytest
 from fastapi import HTTPException
 
 from app import main
-from app.schemas import ChatCompletionRequest, ChatMessage, ResponsesRequest
+from app.schemas import ChatCompletionRequest, ChatMessage, ResponsesRequest, XCodexOptions
+
+
+_CALLED_AT_RE = re.compile(r"called_at=(\d{6})\b")
+# Validated once; tests that need a variant take a model_copy(update=...).
+_BASE_CHAT_REQ = ChatCompletionRequest(
+    model="gpt-5",
+    messages=[ChatMessage(role="user", content="hello")],
+    stream=False,
+)
+_BASE_RESPONSES_REQ = ResponsesRequest(model="gpt-5", input="ping", stream=False)
+
+
+@pytest.fixture(scope="module")
+def main_info_logging():
+    """Keep app.main at INFO for the caplog tests without a per-test at_level()."""
+    previous_level = main.logger.level
+    main.logger.setLevel(logging.INFO)
+    yield
+    main.logger.setLevel(previous_level)
 
 
 def test_app_main_logger_defaults_to_info_level():
@@ -25,6 +45,7 @@ def test_app_main_logger_uses_stdout_stream_handler():
     )
 
 
+@pytest.mark.usefixtures("main_info_logging")
 def test_chat_completions_logs_request_lifecycle(monkeypatch, caplog):
     monkeypatch.setattr(main, "choose_model", lambda _model: ("codex-cli", None))
     monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", []))
@@ -34,36 +55,29 @@ def test_chat_completions_logs_request_lifecycle(monkeypatch, caplog):
 
     monkeypatch.setattr(main, "run_codex_last_message", _fake_run_codex_last_message)
 
-    req = ChatCompletionRequest(
-        model="gpt-5",
-        messages=[ChatMessage(role="user", content="hello")],
-        stream=False,
-    )
+    req = _BASE_CHAT_REQ
 
-    with caplog.at_level(logging.INFO, logger="app.main"):
-        response = asyncio.run(main.chat_completions(req))
+    response = asyncio.run(main.chat_completions(req))
 
-    assert response.choices[0].message.content == "ok"
-    messages = [record.message for record in caplog.records]
-    assert any(
-        "chat.completions request started" in msg
-        and "called_at=" in msg
-        and "params=" in msg
-        and "request_preview=" in msg
-        for msg in messages
-    )
-    started_msg = next(msg for msg in messages if "chat.completions request started" in msg)
-    matched = re.search(r"called_at=(\d{6})\b", started_msg)
-    assert matched is not None
-    assert any(
-        "chat.completions request completed" in msg
-        and "duration_ms=" in msg
-        and "response_chars=" in msg
-        and "response_preview=" in msg
-        for msg in messages
-    )
+    assert json.loads(response.body)["choices"][0]["message"]["content"] == "ok"
+    started = completed = None
+    for record in caplog.records:
+        msg = record.message
+        if "chat.completions request started" in msg:
+            started = msg
+        elif "chat.completions request completed" in msg:
+            completed = msg
 
+    assert started is not None
+    assert "params=" in started and "request_preview=" in started
+    assert _CALLED_AT_RE.search(started) is not None
+    assert completed is not None
+    assert "duration_ms=" in completed
+    assert "response_chars=" in completed
+    assert "response_preview=" in completed
 
+
+@pytest.mark.usefixtures("main_info_logging")
 def test_responses_logs_codex_error(monkeypatch, caplog):
     monkeypatch.setattr(main, "choose_model", lambda _model: ("codex-cli", None))
     monkeypatch.setattr(main, "normalize_responses_input", lambda _input: [{"role": "user", "content": "ping"}])
@@ -74,11 +88,10 @@ def test_responses_logs_codex_error(monkeypatch, caplog):
 
     monkeypatch.setattr(main, "run_codex_last_message", _fake_run_codex_last_message)
 
-    req = ResponsesRequest(model="gpt-5", input="ping", stream=False)
+    req = _BASE_RESPONSES_REQ
 
-    with caplog.at_level(logging.WARNING, logger="app.main"):
-        with pytest.raises(HTTPException) as exc_info:
-            asyncio.run(main.responses_endpoint(req))
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(main.responses_endpoint(req))
 
     assert exc_info.value.status_code == 502
     warnings = [record.message for record in caplog.records if record.levelno >= logging.WARNING]
@@ -89,3 +102,113 @@ def test_responses_logs_codex_error(monkeypatch, caplog):
         and "request_params=" in msg
         for msg in warnings
     )
+
+
+def test_lazy_compact_json_serializes_once(monkeypatch):
+    calls = []
+    real = main._compact_json
+
+    def _counting(payload):
+        calls.append(payload)
+        return real(payload)
+
+    monkeypatch.setattr(main, "_compact_json", _counting)
+    lazy = main._LazyCompactJson({"model": "gpt-5", "stream": None})
+
+    assert calls == []
+    assert str(lazy) == '{"model":"gpt-5"}'
+    assert str(lazy) == '{"model":"gpt-5"}'
+    assert len(calls) == 1
+
+
+def test_now_hhmmss_formats_once_per_second(monkeypatch):
+    monkeypatch.setattr(main, "_HHMMSS_CACHE", (-1, ""))
+    monkeypatch.setattr(main.time, "time", lambda: 1_700_000_000.25)
+    expected = main.time.strftime("%H%M%S", main.time.localtime(1_700_000_000))
+
+    assert main._now_hhmmss() == expected
+    monkeypatch.setattr(main.time, "strftime", lambda *_args: "unused")
+    assert main._now_hhmmss() == expected
+
+
+def test_build_request_preview_stops_once_limit_is_reached():
+    limit = main._LOG_PREVIEW_LIMIT
+    messages = [
+        {"role": "user", "content": "a" * (limit - 10)},
+        {"role": "assistant", "content": "b" * 20},
+        {"role": "user", "content": "never included"},
+    ]
+
+    preview = main._build_request_preview(messages)
+
+    joined = "user:" + "a" * (limit - 10) + " | assistant:" + "b" * 20
+    assert preview == f"{joined[:limit]}...(truncated, total={len(joined)})"
+
+
+def test_info_log_arguments_are_skipped_when_info_is_disabled(monkeypatch):
+    monkeypatch.setattr(main, "choose_model", lambda _model: ("codex-cli", None))
+    monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", []))
+
+    async def _fake_run_codex_last_message(*_args, **_kwargs):
+        return "ok"
+
+    def _unexpected(*_args, **_kwargs):
+        raise AssertionError("preview built while INFO is disabled")
+
+    monkeypatch.setattr(main, "run_codex_last_message", _fake_run_codex_last_message)
+    monkeypatch.setattr(main, "_build_request_preview", _unexpected)
+    monkeypatch.setattr(main, "_truncate_text", _unexpected)
+
+    req = _BASE_CHAT_REQ
+
+    previous_level = main.logger.level
+    main.logger.setLevel(logging.WARNING)
+    try:
+        response = asyncio.run(main.chat_completions(req))
+    finally:
+        main.logger.setLevel(previous_level)
+    assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("main_info_logging")
+def test_stream_completion_log_caps_response_preview(monkeypatch, caplog):
+    monkeypatch.setattr(main, "choose_model", lambda _model: ("codex-cli", None))
+    monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", []))
+    limit = main._LOG_PREVIEW_LIMIT
+
+    async def _fake_run_codex(*_args, **_kwargs):
+        yield "a" * (limit - 5)
+        yield "b" * 10
+        yield "c" * 10
+
+    monkeypatch.setattr(main, "run_codex", _fake_run_codex)
+
+    req = _BASE_CHAT_REQ.model_copy(update={"stream": True})
+
+    async def _drain() -> None:
+        response = await main.chat_completions(req)
+        async for _ in response.body_iterator:
+            pass
+
+    asyncio.run(_drain())
+
+    completed = next(
+        record.message for record in caplog.records if "chat.completions request completed" in record.message
+    )
+    assert f"response_chars={limit + 15}" in completed
+    assert completed.endswith("response_preview=" + "a" * (limit - 5) + "b" * 5)
+
+
+def test_danger_full_access_is_rejected_by_default_policy(monkeypatch):
+    monkeypatch.setattr(main, "choose_model", lambda _model: ("codex-cli", None))
+    monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", []))
+    monkeypatch.setattr(main, "_ALLOW_DANGER_FULL_ACCESS", False)
+
+    req = _BASE_CHAT_REQ.model_copy(
+        update={"x_codex": XCodexOptions(sandbox="danger-full-access")}
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(main.chat_completions(req))
+
+    assert exc_info.value.status_code == 400
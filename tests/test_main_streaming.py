@@ -1,7 +1,25 @@
 import asyncio
+import json
+import os
 
 from app import main
-from app.schemas import ChatCompletionRequest, ChatMessage
+from app.schemas import (
+    ChatCompletionRequest,
+    ChatMessage,
+    ResponsesMessage,
+    ResponsesObject,
+    ResponsesOutputText,
+    ResponsesRequest,
+)
+
+
+# Validated once; each test shares or copies these instead of rebuilding them.
+_STREAM_CHAT_REQ = ChatCompletionRequest(
+    model="gpt",
+    messages=[ChatMessage(role="user", content="hello")],
+    stream=True,
+)
+_STREAM_RESPONSES_REQ = ResponsesRequest(model="gpt", input="ping", stream=True)
 
 
 def test_chat_stream_emits_error_and_done_when_codex_fails(monkeypatch):
@@ -14,24 +32,154 @@ def test_chat_stream_emits_error_and_done_when_codex_fails(monkeypatch):
 
     monkeypatch.setattr(main, "run_codex", _fake_run_codex)
 
-    req = ChatCompletionRequest(
-        model="gpt",
-        messages=[ChatMessage(role="user", content="hello")],
-        stream=True,
-    )
-
-    response = asyncio.run(main.chat_completions(req))
-    assert response.status_code == 200
+    req = _STREAM_CHAT_REQ
 
-    async def _collect() -> list[str]:
-        chunks: list[str] = []
-        async for part in response.body_iterator:
-            chunks.append(part.decode("utf-8", errors="ignore"))
-        return chunks
+    async def _driver() -> list[str]:
+        response = await main.chat_completions(req)
+        assert response.status_code == 200
+        assert response.headers["x-accel-buffering"] == "no"
+        return [part.decode("utf-8", errors="ignore") async for part in response.body_iterator]
 
-    chunks = asyncio.run(_collect())
+    chunks = asyncio.run(_driver())
     merged = "".join(chunks)
     assert "partial" in merged
     assert "\"error\"" in merged
     assert "upstream failed" in merged
     assert "data: [DONE]" in merged
+
+
+def test_json_helpers_match_without_orjson(monkeypatch):
+    payload = {"b": "中文", "a": None, "c": [1, {"x": True}]}
+    fast = (main._json_bytes(payload), main._compact_json(payload))
+
+    monkeypatch.setattr(main, "orjson", None)
+
+    assert (main._json_bytes(payload), main._compact_json(payload)) == fast
+    assert fast[1] == '{"b":"中文","c":[1,{"x":true}]}'
+
+
+def test_chat_stream_delta_frames_are_valid_json(monkeypatch):
+    monkeypatch.setattr(main, "choose_model", lambda _model: ("gpt-5.1", None))
+    monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", []))
+
+    async def _fake_run_codex(*_args, **_kwargs):
+        yield 'say "hi"\n'
+
+    monkeypatch.setattr(main, "run_codex", _fake_run_codex)
+
+    req = _STREAM_CHAT_REQ
+
+    async def _collect() -> list[bytes]:
+        response = await main.chat_completions(req)
+        return [part async for part in response.body_iterator]
+
+    first = asyncio.run(_collect())[0]
+    assert first.startswith(b"data: ") and first.endswith(b"\n\n")
+    assert json.loads(first[len(b"data: ") :]) == {
+        "choices": [{"delta": {"content": 'say "hi"\n'}, "index": 0, "finish_reason": None}]
+    }
+
+
+def test_responses_stream_delta_frames_carry_response_id(monkeypatch):
+    monkeypatch.setattr(main, "choose_model", lambda _model: ("gpt-5.1", None))
+    monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", []))
+
+    async def _fake_run_codex(*_args, **_kwargs):
+        yield "第一"
+        yield "two\n"
+
+    monkeypatch.setattr(main, "run_codex", _fake_run_codex)
+
+    req = _STREAM_RESPONSES_REQ
+
+    async def _collect() -> list[bytes]:
+        response = await main.responses_endpoint(req)
+        return [part async for part in response.body_iterator]
+
+    frames = asyncio.run(_collect())
+    created = json.loads(frames[0].split(b"data: ", 1)[1])
+    deltas = [
+        json.loads(frame.split(b"data: ", 1)[1])
+        for frame in frames
+        if frame.startswith(b"event: response.output_text.delta\n")
+    ]
+    assert deltas == [
+        {"id": created["id"], "delta": "第一"},
+        {"id": created["id"], "delta": "two\n"},
+    ]
+
+    completed_frame = next(f for f in frames if f.startswith(b"event: response.completed\n"))
+    completed = json.loads(completed_frame.split(b"data: ", 1)[1])
+    expected = ResponsesObject(
+        id=created["id"],
+        created=created["created"],
+        model="gpt",
+        status="completed",
+        output=[
+            ResponsesMessage(
+                id=completed["output"][0]["id"],
+                content=[ResponsesOutputText(text="第一two\n")],
+            )
+        ],
+    ).model_dump()
+    assert completed == expected
+
+
+def test_chat_stream_keeps_images_until_stream_ends(monkeypatch, tmp_path):
+    image = tmp_path / "img.png"
+    image.write_bytes(b"png")
+    seen_during_stream = []
+
+    monkeypatch.setattr(main, "choose_model", lambda _model: ("gpt-5.1", None))
+    monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", ["data:"]))
+
+    async def _fake_save_images(_urls):
+        return [str(image)]
+
+    async def _fake_run_codex(_prompt, _overrides, images, **_kwargs):
+        seen_during_stream.extend(os.path.exists(p) for p in images)
+        yield "ok"
+
+    monkeypatch.setattr(main, "save_images", _fake_save_images)
+    monkeypatch.setattr(main, "run_codex", _fake_run_codex)
+
+    req = _STREAM_CHAT_REQ
+
+    async def _run() -> None:
+        response = await main.chat_completions(req)
+        assert response.background is None
+        assert image.exists()
+        _ = [part async for part in response.body_iterator]
+
+    asyncio.run(_run())
+    assert seen_during_stream == [True]
+    assert not image.exists()
+
+
+def test_responses_stream_removes_images_when_client_disconnects(monkeypatch, tmp_path):
+    image = tmp_path / "img.png"
+    image.write_bytes(b"png")
+
+    monkeypatch.setattr(main, "choose_model", lambda _model: ("gpt-5.1", None))
+    monkeypatch.setattr(main, "build_prompt_and_images", lambda _messages: ("prompt", ["data:"]))
+
+    async def _fake_save_images(_urls):
+        return [str(image)]
+
+    async def _fake_run_codex(*_args, **_kwargs):
+        yield "one"
+        yield "two"
+
+    monkeypatch.setattr(main, "save_images", _fake_save_images)
+    monkeypatch.setattr(main, "run_codex", _fake_run_codex)
+
+    async def _run() -> None:
+        response = await main.responses_endpoint(_STREAM_RESPONSES_REQ)
+        body = response.body_iterator
+        await body.__anext__()
+        assert image.exists()
+        # What Starlette does when the send fails mid-stream.
+        await body.aclose()
+
+    asyncio.run(_run())
+    assert not image.exists()
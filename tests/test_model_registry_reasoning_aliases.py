@@ -1,13 +1,25 @@
+import pytest
+
 from app import model_registry
 
 
-def test_gpt51_models_expose_reasoning_aliases(monkeypatch):
+@pytest.fixture
+def registry(monkeypatch):
+    """Rebind the registry's model list and reasoning alias map together."""
+
+    def _set(available, alias_map=None):
+        monkeypatch.setattr(model_registry, "_AVAILABLE_MODELS", available)
+        monkeypatch.setattr(model_registry, "_REASONING_ALIAS_MAP", alias_map or {})
+
+    return _set
+
+
+def test_gpt51_models_expose_reasoning_aliases(registry):
     available = ["gpt-5.1", "o4-mini"]
-    monkeypatch.setattr(model_registry, "_AVAILABLE_MODELS", available)
-    merged = model_registry._merge_default_reasoning_aliases(
-        available, {"o4-mini": ("low",)}
+    registry(
+        available,
+        model_registry._merge_default_reasoning_aliases(available, {"o4-mini": ("low",)}),
     )
-    monkeypatch.setattr(model_registry, "_REASONING_ALIAS_MAP", merged)
 
     models = model_registry.get_available_models(include_reasoning_aliases=True)
 
@@ -17,11 +29,9 @@ def test_gpt51_models_expose_reasoning_aliases(monkeypatch):
     assert "o4-mini low" in models
 
 
-def test_choose_model_accepts_gpt51_reasoning_suffix(monkeypatch):
+def test_choose_model_accepts_gpt51_reasoning_suffix(registry):
     available = ["gpt-5.1"]
-    monkeypatch.setattr(model_registry, "_AVAILABLE_MODELS", available)
-    merged = model_registry._merge_default_reasoning_aliases(available, {})
-    monkeypatch.setattr(model_registry, "_REASONING_ALIAS_MAP", merged)
+    registry(available, model_registry._merge_default_reasoning_aliases(available, {}))
 
     model, effort = model_registry.choose_model("gpt-5.1 low")
 
@@ -29,10 +39,9 @@ def test_choose_model_accepts_gpt51_reasoning_suffix(monkeypatch):
     assert effort == "low"
 
 
-def test_choose_model_accepts_gpt_alias(monkeypatch):
+def test_choose_model_accepts_gpt_alias(registry):
     available = ["gpt-5.1", "gpt-5.3-codex", "gpt-5"]
-    monkeypatch.setattr(model_registry, "_AVAILABLE_MODELS", available)
-    monkeypatch.setattr(model_registry, "_REASONING_ALIAS_MAP", {})
+    registry(available)
 
     model, effort = model_registry.choose_model("gpt")
 
@@ -40,10 +49,9 @@ def test_choose_model_accepts_gpt_alias(monkeypatch):
     assert effort == "low"
 
 
-def test_choose_model_accepts_local_openai_alias(monkeypatch):
+def test_choose_model_accepts_local_openai_alias(registry):
     available = ["gpt-5.1", "gpt-5.3-codex", "gpt-5"]
-    monkeypatch.setattr(model_registry, "_AVAILABLE_MODELS", available)
-    monkeypatch.setattr(model_registry, "_REASONING_ALIAS_MAP", {})
+    registry(available)
 
     model, effort = model_registry.choose_model("local_openai")
 
@@ -51,12 +59,56 @@ def test_choose_model_accepts_local_openai_alias(monkeypatch):
     assert effort is None
 
 
-def test_choose_model_prefers_gpt54_alias_when_available(monkeypatch):
+def test_choose_model_prefers_gpt54_alias_when_available(registry):
     available = ["gpt-5.1", "gpt-5.4", "gpt-5.3-codex", "gpt-5"]
-    monkeypatch.setattr(model_registry, "_AVAILABLE_MODELS", available)
-    monkeypatch.setattr(model_registry, "_REASONING_ALIAS_MAP", {})
+    registry(available)
 
     model, effort = model_registry.choose_model("gpt")
 
     assert model == "gpt-5.4"
     assert effort == "low"
+
+
+def test_model_lookups_refresh_when_registry_is_rebound(registry):
+    registry(["gpt-5.1"])
+
+    assert model_registry.choose_model("gpt") == ("gpt-5.1", "low")
+    assert model_registry.get_available_models(include_reasoning_aliases=True) == ["gpt-5.1"]
+
+    registry(["gpt-5.4", "gpt-5.1"], {"gpt-5.4": ("high",)})
+
+    assert model_registry.choose_model("gpt") == ("gpt-5.4", "low")
+    assert model_registry.get_available_models(include_reasoning_aliases=True) == [
+        "gpt-5.4",
+        "gpt-5.1",
+        "gpt-5.4 high",
+    ]
+
+
+def test_unknown_model_error_lists_current_models(registry):
+    registry(["gpt-5.1"], {"gpt-5.1": ("low",)})
+
+    with pytest.raises(ValueError, match="Choose one of: gpt-5.1, gpt-5.1 low$"):
+        model_registry.choose_model("gpt-4o")
+
+    registry(["gpt-5.4"])
+
+    with pytest.raises(ValueError, match="Choose one of: gpt-5.4$"):
+        model_registry.choose_model("gpt-5.1")
+
+
+def test_plain_model_list_refreshes_when_registry_is_rebound(registry):
+    registry(["gpt-5.1", "gpt-5.1"])
+
+    models = model_registry.get_available_models()
+    models.append("mutated")
+    assert model_registry.get_available_models() == ["gpt-5.1"]
+
+    registry(["gpt-5.4"])
+    assert model_registry.get_available_models() == ["gpt-5.4"]
+
+
+def test_augment_models_adds_codex_base_aliases_in_order():
+    models = ["gpt-5.1-codex", "o4-mini", "", "gpt-5.1", "-codex", "gpt-5.1-codex"]
+
+    assert model_registry._augment_models(models) == ["gpt-5.1-codex", "gpt-5.1", "o4-mini", "-codex"]
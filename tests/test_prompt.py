@@ -0,0 +1,74 @@
+import pytest
+
+from app.prompt import build_prompt_and_images, normalize_responses_input
+
+
+def test_build_prompt_puts_system_text_first():
+    messages = [
+        {"role": "user", "content": " hello "},
+        {"role": "developer", "content": "be brief"},
+        {"role": "assistant", "content": "hi"},
+        {"role": "system", "content": "answer in English"},
+    ]
+
+    prompt, images = build_prompt_and_images(messages)
+
+    assert prompt == "be brief\nanswer in English\n\nUser: hello\nAssistant: hi\nAssistant:"
+    assert images == []
+
+
+def test_build_prompt_collects_images_and_defaults_role_to_user():
+    messages = [
+        {
+            "role": None,
+            "content": [
+                {"type": "text", "text": "what is this?"},
+                {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+                {"type": "input_image", "url": "https://example.com/a.png"},
+            ],
+        },
+        {"role": "tool", "content": "result"},
+    ]
+
+    prompt, images = build_prompt_and_images(messages)
+
+    assert prompt == "User: what is this?\nAssistant: result\nAssistant:"
+    assert images == ["data:image/png;base64,AAAA", "https://example.com/a.png"]
+
+
+def test_non_text_content_does_not_leak_into_prompt():
+    messages = [
+        {"role": "user", "content": [{"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}}]},
+        {"role": "user", "content": None},
+        {"role": "user", "content": 42},
+    ]
+
+    prompt, images = build_prompt_and_images(messages)
+
+    assert prompt == "User: \nUser: \nUser: 42\nAssistant:"
+    assert images == ["data:image/png;base64,AAAA"]
+
+
+def test_normalize_responses_input_shapes():
+    parts = [{"type": "input_text", "text": "hi"}]
+    chat = [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}]
+
+    assert normalize_responses_input("hi") == [{"role": "user", "content": "hi"}]
+    assert normalize_responses_input(parts) == [{"role": "user", "content": parts}]
+    assert normalize_responses_input(chat) == chat
+    assert normalize_responses_input(["a", "b"]) == [{"role": "user", "content": "ab"}]
+    assert normalize_responses_input([]) == []
+
+
+@pytest.mark.parametrize(
+    "inp",
+    [
+        [{"role": "user", "content": "a"}, {"role": "user"}],
+        ["a", {"role": "user", "content": "b"}],
+        [1, 2],
+        {"role": "user", "content": "a"},
+    ],
+)
+def test_normalize_responses_input_rejects_mixed_or_unknown_shapes(inp):
+    with pytest.raises(ValueError, match="Unsupported input format"):
+        normalize_responses_input(inp)
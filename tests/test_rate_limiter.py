@@ -0,0 +1,50 @@
+import asyncio
+from array import array
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app import deps
+
+
+def _request(ip: str) -> SimpleNamespace:
+    return SimpleNamespace(client=SimpleNamespace(host=ip))
+
+
+def _fresh_buckets(monkeypatch) -> None:
+    monkeypatch.setattr(deps, "_bucket_counts", array("i", [0]) * deps._BUCKET_COUNT)
+    monkeypatch.setattr(deps, "_bucket_resets", array("d", [0.0]) * deps._BUCKET_COUNT)
+    # Deterministic, collision-free slots for the addresses used below.
+    monkeypatch.setattr(deps, "_bucket_index", lambda ip: int(ip.rsplit(".", 1)[1]))
+
+
+def test_rate_limiter_blocks_after_limit_per_ip(monkeypatch):
+    monkeypatch.setattr(deps.settings, "rate_limit_per_minute", 2, raising=False)
+    _fresh_buckets(monkeypatch)
+
+    async def _run() -> None:
+        await deps.rate_limiter(_request("10.0.0.1"))
+        await deps.rate_limiter(_request("10.0.0.1"))
+        with pytest.raises(HTTPException) as exc_info:
+            await deps.rate_limiter(_request("10.0.0.1"))
+        assert exc_info.value.status_code == 429
+        await deps.rate_limiter(_request("10.0.0.2"))
+
+    asyncio.run(_run())
+
+
+def test_rate_limiter_resets_after_window(monkeypatch):
+    monkeypatch.setattr(deps.settings, "rate_limit_per_minute", 1, raising=False)
+    _fresh_buckets(monkeypatch)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(deps.time, "time", lambda: clock["now"])
+
+    async def _run() -> None:
+        await deps.rate_limiter(_request("10.0.0.1"))
+        with pytest.raises(HTTPException):
+            await deps.rate_limiter(_request("10.0.0.1"))
+        clock["now"] += 61
+        await deps.rate_limiter(_request("10.0.0.1"))
+
+    asyncio.run(_run())
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from app import security
+
+
+LOCAL_CONFIG = """
+model_provider = "local"
+
+[model_providers.local]
+base_url = "http://127.0.0.1:11434/v1"
+"""
+
+REMOTE_CONFIG = """
+model_provider = "remote"
+
+[model_providers.remote]
+base_url = "https://llm.example.com/v1"
+"""
+
+
+@pytest.fixture
+def codex_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("CODEX_HOME", str(tmp_path))
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    security._invalidate_config_cache()
+    yield tmp_path
+    security._invalidate_config_cache()
+
+
+def _write_config(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_local_check_reuses_parsed_config_until_file_changes(codex_home, monkeypatch):
+    config = codex_home / "config.toml"
+    _write_config(config, LOCAL_CONFIG, 1_000_000_000)
+
+    parses = []
+    real_loads = security.tomllib.loads
+    monkeypatch.setattr(
+        security.tomllib, "loads", lambda text: parses.append(text) or real_loads(text)
+    )
+
+    security.assert_local_only_or_raise()
+    security.assert_local_only_or_raise()
+    assert len(parses) == 1
+
+    _write_config(config, REMOTE_CONFIG, 2_000_000_000)
+    with pytest.raises(ValueError, match="provider='remote'"):
+        security.assert_local_only_or_raise()
+    assert len(parses) == 2
+
+
+def test_local_check_follows_openai_base_url_without_config(codex_home, monkeypatch):
+    with pytest.raises(ValueError, match="provider='openai'"):
+        security.assert_local_only_or_raise()
+
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://localhost:8080/v1")
+    security.assert_local_only_or_raise()
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("http://localhost:11434/v1", True),
+        ("HTTPS://LocalHost", True),
+        ("http://127.0.0.1/", True),
+        ("http://[::1]:8080/v1", True),
+        ("unix:///tmp/llm.sock", True),
+        ("http://localhost.example.com/v1", False),
+        ("http://localhost@llm.example.com/v1", False),
+        ("http://evil.com\\@localhost/v1", False),
+        ("http://evil.com\\@127.0.0.1:8000/v1", False),
+        ("http://evil.com@localhost/v1", False),
+        ("http://localhost:port/v1", False),
+        ("http://[::1/v1", False),
+        ("ftp://localhost/", False),
+        ("", False),
+    ],
+)
+def test_is_local_url(url, expected):
+    assert security._is_local_url(url) is expected